@@ -4,7 +4,6 @@ from functools import lru_cache
 import glob
 import importlib
 import importlib.util
-import logging
 import os
 import pathlib
 import pkgutil
@@ -16,6 +15,8 @@ import questionary
 
 from gupb import controller
 from gupb import runner
+from gupb.logger import core as logger_core
+from gupb.logger import sinks as logger_sinks
 
 # noinspection PyUnresolvedReferences
 @lru_cache()
@@ -133,37 +134,14 @@ def configuration_inquiry(initial_config: dict[str, Any]) -> dict[str, Any]:
     return answers
 
 
-def configure_logging(log_directory: str) -> None:
+def configure_logging(log_directory: str, asynchronous: bool = False, binary: bool = False) -> None:
     logging_dir_path = pathlib.Path(log_directory)
     logging_dir_path.mkdir(parents=True, exist_ok=True)
     logging_dir_path.chmod(0o777)
     time = datetime.now().strftime('%Y_%m_%d_%H_%M_%S')
-
-    verbose_logger = logging.getLogger('verbose')
-    verbose_logger.propagate = False
-    verbose_file_path = logging_dir_path / f'gupb__{time}.log'
-    verbose_file_handler = logging.FileHandler(verbose_file_path.as_posix())
-    verbose_formatter = logging.Formatter(
-        '%(asctime)s | %(levelname)s | %(module)s.%(funcName)s:%(lineno)d | %(message)s'
-    )
-    verbose_file_handler.setFormatter(verbose_formatter)
-    verbose_logger.addHandler(verbose_file_handler)
-    verbose_logger.setLevel(logging.DEBUG)
-
-    json_logger = logging.getLogger('json')
-    json_logger.propagate = False
-    json_file_path = logging_dir_path / f'gupb__{time}.json'
-    json_file_handler = logging.FileHandler(json_file_path.as_posix())
-    json_formatter = logging.Formatter(
-        '{"time_stamp": "%(asctime)s",'
-        ' "severity": "%(levelname)s",'
-        ' "line": "%(module)s.%(funcName)s:%(lineno)d",'
-        ' "type": "%(event_type)s",'
-        ' "value": %(message)s}'
+    logger_sinks.configure_game_logs(
+        logger_sinks.GameLogSettings(logging_dir_path.as_posix(), f'gupb__{time}', asynchronous, binary)
     )
-    json_file_handler.setFormatter(json_formatter)
-    json_logger.addHandler(json_file_handler)
-    json_logger.setLevel(logging.DEBUG)
 
 
 @click.command()
@@ -173,8 +151,24 @@ def configure_logging(log_directory: str) -> None:
               is_flag=True, help="Whether to configure the runner interactively on start.")
 @click.option('-l', '--log_directory', default='results',
               type=click.Path(exists=False), help="The path to log storage directory.")
-def main(config_path: str, inquiry: bool, log_directory: str) -> None:
-    configure_logging(log_directory)
+@click.option('-n', '--no_logging',
+              is_flag=True, help="Whether to drop all logs, e.g. for benchmarking.")
+@click.option('-a', '--async_logging',
+              is_flag=True, help="Whether to write logs in batches from a background thread.")
+@click.option('-b', '--binary_logging',
+              is_flag=True, help="Whether to store the json events in the compact binary format.")
+def main(
+        config_path: str,
+        inquiry: bool,
+        log_directory: str,
+        no_logging: bool,
+        async_logging: bool,
+        binary_logging: bool,
+) -> None:
+    if no_logging:
+        logger_core.disable_logging()
+    else:
+        configure_logging(log_directory, async_logging, binary_logging)
     current_config = load_initial_config(config_path)
     current_config = configuration_inquiry(current_config) if inquiry else current_config
     game_runner = runner.Runner(current_config)
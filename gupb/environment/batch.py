@@ -0,0 +1,197 @@
+"""
+Batches of games played in lockstep for training a learning controller. Each call steps the champion of
+the learner in every game of the batch, and the rest of every game is played headless in between.
+"""
+from __future__ import annotations
+import multiprocessing
+from multiprocessing import connection, shared_memory
+import os
+import random
+from typing import Any, Optional
+
+import numpy as np
+
+from gupb import controller
+from gupb.environment import observations
+from gupb.environment import sessions
+from gupb.model import visibility
+
+StepResult = tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, list[dict[str, Any]]]
+
+
+class BatchEnv:
+    """
+    Plays `n_games` games in lockstep in this process. Observations are stacked along the first axis and
+    actions are indices into `sessions.ACTIONS`. A finished game is replaced with a new one right away,
+    so the observation returned for it starts the next game, while its last one and the score are in
+    its info.
+    """
+
+    def __init__(
+            self,
+            n_games: int,
+            arena_names: list[str],
+            opponents: list[controller.Controller],
+            seed: Optional[int] = None,
+            visibility_engine: str = visibility.DEFAULT_ENGINE,
+            first_index: int = 0,
+            out: Optional[np.ndarray] = None,
+    ) -> None:
+        self.n_games: int = n_games
+        self.arena_names: list[str] = arena_names
+        self.seed: int = seed if seed is not None else random.getrandbits(64)
+        self.first_index: int = first_index
+        self.sessions: list[sessions.GameSession] = [
+            sessions.GameSession(arena_names, opponents, random.Random(), visibility_engine) for _ in range(n_games)
+        ]
+        self.observations: np.ndarray = (
+            np.zeros((n_games, *observations.observation_shape(arena_names)), dtype=np.uint8) if out is None else out
+        )
+
+    def reset(self, seed: Optional[int] = None) -> tuple[np.ndarray, list[dict[str, Any]]]:
+        infos = self.reset_in_place(seed)
+        return self.observations.copy(), infos
+
+    def step(self, actions: np.ndarray) -> StepResult:
+        rewards, terminated, truncated, infos = self.step_in_place(actions)
+        return self.observations.copy(), rewards, terminated, truncated, infos
+
+    def reset_in_place(self, seed: Optional[int] = None) -> list[dict[str, Any]]:
+        """ Like `reset`, but leaves the observations in `observations` only. """
+        if seed is not None:
+            self.seed = seed
+        # Controllers draw from the global generator, it is seeded as well to keep them reproducible.
+        random.seed(f'{self.seed}/{self.first_index}')
+        for i, session in enumerate(self.sessions):
+            session.rng.seed(f'{self.seed}/{self.first_index + i}')
+            session.games_played = 0
+            session.reset()
+            session.observe(self.observations[i])
+        return [{} for _ in self.sessions]
+
+    def step_in_place(self, actions: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, list[dict[str, Any]]]:
+        """ Like `step`, but leaves the observations in `observations` only. """
+        rewards = np.zeros(self.n_games, dtype=np.float32)
+        terminated = np.zeros(self.n_games, dtype=bool)
+        infos = [{} for _ in self.sessions]
+        for i, (session, action) in enumerate(zip(self.sessions, np.asarray(actions).tolist())):
+            rewards[i], terminated[i] = session.step(sessions.ACTIONS[action])
+            if terminated[i]:
+                infos[i] = {'final_observation': session.observe(), **session.final_info()}
+                session.reset()
+            session.observe(self.observations[i])
+        return rewards, terminated, np.zeros(self.n_games, dtype=bool), infos
+
+    def close(self) -> None:
+        self.sessions = []
+
+
+class SubprocessBatchEnv:
+    """
+    Plays `n_games` games in lockstep split across worker processes, each stepping its own `BatchEnv`.
+    The workers write the observations straight into shared memory, only actions, rewards and infos are
+    sent through pipes.
+    """
+
+    def __init__(
+            self,
+            n_games: int,
+            arena_names: list[str],
+            opponents: list[controller.Controller],
+            seed: Optional[int] = None,
+            visibility_engine: str = visibility.DEFAULT_ENGINE,
+            workers: Optional[int] = None,
+    ) -> None:
+        self.n_games: int = n_games
+        self.seed: int = seed if seed is not None else random.getrandbits(64)
+        shape = (n_games, *observations.observation_shape(arena_names))
+        self.memory: shared_memory.SharedMemory = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+        self.observations: np.ndarray = np.ndarray(shape, dtype=np.uint8, buffer=self.memory.buf)
+        workers = max(1, min(workers or os.cpu_count() or 1, n_games))
+        bounds = np.linspace(0, n_games, workers + 1).astype(int).tolist()
+        self.slices: list[tuple[int, int]] = list(zip(bounds[:-1], bounds[1:]))
+        self.pipes: list[connection.Connection] = []
+        self.processes: list[multiprocessing.Process] = []
+        for start, stop in self.slices:
+            pipe, worker_pipe = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_serve,
+                args=(
+                    worker_pipe, self.memory.name, shape, start, stop,
+                    arena_names, opponents, self.seed, visibility_engine,
+                ),
+                name=f'batch-env:{start}-{stop}',
+                daemon=True,
+            )
+            process.start()
+            worker_pipe.close()
+            self.pipes.append(pipe)
+            self.processes.append(process)
+
+    def reset(self, seed: Optional[int] = None) -> tuple[np.ndarray, list[dict[str, Any]]]:
+        if seed is not None:
+            self.seed = seed
+        for pipe in self.pipes:
+            pipe.send(('reset', self.seed))
+        infos = [info for pipe in self.pipes for info in pipe.recv()]
+        return self.observations.copy(), infos
+
+    def step(self, actions: np.ndarray) -> StepResult:
+        actions = np.asarray(actions)
+        for pipe, (start, stop) in zip(self.pipes, self.slices):
+            pipe.send(('step', actions[start:stop]))
+        results = [pipe.recv() for pipe in self.pipes]
+        return (
+            self.observations.copy(),
+            np.concatenate([rewards for rewards, _, _, _ in results]),
+            np.concatenate([terminated for _, terminated, _, _ in results]),
+            np.concatenate([truncated for _, _, truncated, _ in results]),
+            [info for _, _, _, infos in results for info in infos],
+        )
+
+    def close(self) -> None:
+        for pipe in self.pipes:
+            try:
+                pipe.send(('close', None))
+            except (BrokenPipeError, EOFError):
+                pass
+        for process in self.processes:
+            process.join()
+        for pipe in self.pipes:
+            pipe.close()
+        self.pipes, self.processes = [], []
+        del self.observations
+        self.memory.close()
+        self.memory.unlink()
+
+
+def _serve(
+        pipe: connection.Connection,
+        memory_name: str,
+        shape: tuple[int, ...],
+        start: int,
+        stop: int,
+        arena_names: list[str],
+        opponents: list[controller.Controller],
+        seed: int,
+        visibility_engine: str,
+) -> None:
+    memory = shared_memory.SharedMemory(name=memory_name)
+    out = np.ndarray(shape, dtype=np.uint8, buffer=memory.buf)[start:stop]
+    env = BatchEnv(stop - start, arena_names, opponents, seed, visibility_engine, start, out)
+    try:
+        while True:
+            command, argument = pipe.recv()
+            if command == 'reset':
+                pipe.send(env.reset_in_place(argument))
+            elif command == 'step':
+                pipe.send(env.step_in_place(argument))
+            else:
+                break
+    except (KeyboardInterrupt, EOFError):
+        pass
+    finally:
+        env.close()
+        del out
+        memory.close()
+        pipe.close()
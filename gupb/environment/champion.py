@@ -0,0 +1,55 @@
+from __future__ import annotations
+import random
+from typing import Any, Optional
+
+import gymnasium
+from gymnasium import spaces
+import numpy as np
+
+from gupb import controller
+from gupb.environment import observations
+from gupb.environment import sessions
+from gupb.model import visibility
+
+
+class ChampionEnv(gymnasium.Env):
+    """
+    A game from the point of view of one champion, with the other champions driven by copies of the
+    opponents. Observations are the channels of `observations.CHANNELS` and actions are indices into
+    `sessions.ACTIONS`. The reward is the tournament score of the champion, given when the game ends.
+    """
+
+    metadata = {'render_modes': []}
+
+    def __init__(
+            self,
+            arena_names: list[str],
+            opponents: list[controller.Controller],
+            visibility_engine: str = visibility.DEFAULT_ENGINE,
+    ) -> None:
+        self.session: sessions.GameSession = sessions.GameSession(
+            arena_names, opponents, random.Random(), visibility_engine,
+        )
+        self.observation_space: spaces.Box = spaces.Box(
+            0, observations.MAX_VALUE, observations.observation_shape(arena_names), dtype=np.uint8,
+        )
+        self.action_space: spaces.Discrete = spaces.Discrete(len(sessions.ACTIONS))
+
+    def reset(
+            self,
+            *,
+            seed: Optional[int] = None,
+            options: Optional[dict[str, Any]] = None,
+    ) -> tuple[np.ndarray, dict[str, Any]]:
+        super().reset(seed=seed)
+        if seed is not None:
+            # Controllers draw from the global generator, it is seeded as well to keep them reproducible.
+            random.seed(seed)
+        self.session.rng.seed(int(self.np_random.integers(2 ** 63)))
+        self.session.reset()
+        return self.session.observe(), {}
+
+    def step(self, action: int) -> tuple[np.ndarray, float, bool, bool, dict[str, Any]]:
+        reward, terminated = self.session.step(sessions.ACTIONS[int(action)])
+        info = self.session.final_info() if terminated else {}
+        return self.session.observe(), reward, terminated, False, info
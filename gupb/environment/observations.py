@@ -0,0 +1,125 @@
+"""
+Fixed-shape observations of a game from the point of view of one champion. Every channel is a uint8 plane
+indexed [y, x], padded with zeros to the size of the largest arena in play, so that observations of games
+on different arenas can be stacked. They are filled from the arrays the terrain keeps up to date and show
+no more than a controller could know: the arena itself, and the rest only where the champion sees it.
+"""
+from __future__ import annotations
+from typing import Iterable, Optional
+
+import numpy as np
+
+from gupb.model import arenas
+from gupb.model import characters
+from gupb.model import effects
+from gupb.model import terrains
+from gupb.model import tiles
+
+CHANNELS: tuple[str, ...] = (
+    'terrain', 'visible', 'loot', 'consumables', 'effects', 'menhir',
+    'champion', 'enemies', 'health', 'weapons', 'facing',
+)
+
+(
+    TERRAIN_CHANNEL, VISIBLE_CHANNEL, LOOT_CHANNEL, CONSUMABLES_CHANNEL, EFFECTS_CHANNEL, MENHIR_CHANNEL,
+    CHAMPION_CHANNEL, ENEMIES_CHANNEL, HEALTH_CHANNEL, WEAPONS_CHANNEL, FACING_CHANNEL,
+) = range(len(CHANNELS))
+
+FACING_CODES: dict[characters.Facing, int] = {facing: code for code, facing in enumerate(characters.Facing, start=1)}
+
+MAX_VALUE: int = 255
+
+
+def arenas_size(arena_names: Iterable[str]) -> tuple[int, int]:
+    shapes = [arenas.arena_template(name).codes.shape for name in arena_names]
+    return max(width for _, width in shapes), max(height for height, _ in shapes)
+
+
+def observation_shape(arena_names: Iterable[str]) -> tuple[int, int, int]:
+    width, height = arenas_size(arena_names)
+    return len(CHANNELS), height, width
+
+
+class ObservationEncoder:
+    """
+    Encodes the observations of one champion at a time. The menhir is only shown once the champion has
+    seen it, which the encoder remembers until it is `reset` for the next game.
+    """
+
+    def __init__(self, size: tuple[int, int]) -> None:
+        self.size: tuple[int, int] = size
+        self.shape: tuple[int, int, int] = (len(CHANNELS), size[1], size[0])
+        self.menhir_seen: bool = False
+        self._menhir_distance: Optional[np.ndarray] = None
+        self._menhir_plane: Optional[np.ndarray] = None
+        self._mist_distance: Optional[np.ndarray] = None
+        self._mist_radius: Optional[int] = None
+        self._mist_plane: Optional[np.ndarray] = None
+
+    def reset(self) -> None:
+        self.menhir_seen = False
+        self._menhir_distance = self._menhir_plane = None
+        self._mist_distance = self._mist_radius = self._mist_plane = None
+
+    def encode(self, champion: characters.Champion, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """ Encodes into `out`, a C-contiguous array of the observation shape, or into a new array. """
+        arena = champion.arena
+        terrain = arena.terrain
+        width, height = terrain.size
+        if out is None:
+            observation = np.zeros(self.shape, dtype=np.uint8)
+        elif not out.flags.c_contiguous:
+            raise ValueError("Observations can only be encoded into C-contiguous arrays.")
+        else:
+            observation = out
+            observation.fill(0)
+        view = observation[:, :height, :width]
+        # Terrain codes are shifted by one, so that cells outside of the arena are 0.
+        np.add(terrain.codes, 1, out=view[TERRAIN_CHANNEL], casting='unsafe')
+
+        # All the other channels are only filled where the champion sees, which is a small part of the arena.
+        cells = arena.visible_cells(champion)
+        positions = cells if width == self.size[0] else cells // width * self.size[0] + cells % width
+        planes = observation.reshape(len(CHANNELS), -1)
+        planes[VISIBLE_CHANNEL, positions] = 1
+        planes[LOOT_CHANNEL, positions] = terrain.loot_codes.reshape(-1)[cells]
+        planes[CONSUMABLES_CHANNEL, positions] = terrain.consumable_codes.reshape(-1)[cells]
+        effect_masks = terrain.effect_masks.reshape(-1)[cells]
+        mist = self._mist(arena)
+        planes[EFFECTS_CHANNEL, positions] = effect_masks if mist is None else effect_masks | mist[cells]
+        self._encode_menhir(arena, planes[VISIBLE_CHANNEL], view)
+
+        for cell in cells[terrain.occupied.reshape(-1)[cells]].tolist():
+            seen = terrain.tile(cell).character
+            y, x = divmod(cell, width)
+            view[CHAMPION_CHANNEL if seen is champion else ENEMIES_CHANNEL, y, x] = 1
+            view[HEALTH_CHANNEL, y, x] = min(max(seen.health, 0), MAX_VALUE)
+            view[WEAPONS_CHANNEL, y, x] = terrains.item_code(terrains.LOOT_CODES, seen.weapon)
+            view[FACING_CHANNEL, y, x] = FACING_CODES[seen.facing]
+        return observation
+
+    def _encode_menhir(self, arena: arenas.Arena, visible: np.ndarray, view: np.ndarray) -> None:
+        if arena.menhir_position is None:
+            return
+        x, y = arena.menhir_position
+        self.menhir_seen = self.menhir_seen or bool(visible[y * self.size[0] + x])
+        if not self.menhir_seen:
+            view[TERRAIN_CHANNEL, y, x] = terrains.tile_code(tiles.Land) + 1
+            return
+        if self._menhir_distance is not arena.menhir_distance:
+            self._menhir_distance = arena.menhir_distance
+            self._menhir_plane = np.minimum(arena.menhir_distance + 1, MAX_VALUE).astype(np.uint8)
+        view[MENHIR_CHANNEL] = self._menhir_plane
+
+    def _mist(self, arena: arenas.Arena) -> Optional[np.ndarray]:
+        """ The mist effect bit of every cell, flat. """
+        mist = arena.terrain.mist
+        if mist is None:
+            return None
+        # The mist field only changes when its radius shrinks.
+        if self._mist_distance is not arena.menhir_distance or self._mist_radius != mist.radius:
+            distance = arena.menhir_distance.reshape(-1)
+            covered = (distance >= max(mist.radius, 1)) & (distance < mist.outer)
+            self._mist_plane = covered.astype(np.uint8) * np.uint8(effects.MIST_BIT)
+            self._mist_distance, self._mist_radius = arena.menhir_distance, mist.radius
+        return self._mist_plane
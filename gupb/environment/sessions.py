@@ -0,0 +1,126 @@
+"""
+Games played from the point of view of a learning controller, which chooses the actions of its champion
+from outside of the game loop.
+"""
+from __future__ import annotations
+import copy
+import logging
+import random
+from typing import Any, Optional
+
+import numpy as np
+
+from gupb import controller
+from gupb.environment import observations
+from gupb.model import arenas
+from gupb.model import characters
+from gupb.model import games
+from gupb.model import visibility
+
+verbose_logger = logging.getLogger('verbose')
+
+ACTIONS: tuple[characters.Action, ...] = tuple(characters.Action)
+
+LEARNER_NAME: str = 'Learner'
+
+
+# noinspection PyUnusedLocal
+# noinspection PyMethodMayBeStatic
+class LearnerController(controller.Controller):
+    """
+    Stands for the learner in the game. Its actions are handed to `Game.play_headless` directly, so it is
+    never asked to decide and no `ChampionKnowledge` is built for it.
+    """
+
+    def __init__(self, name: str = LEARNER_NAME, tabard: characters.Tabard = characters.Tabard.WHITE) -> None:
+        self.learner_name: str = name
+        self.tabard: characters.Tabard = tabard
+
+    def decide(self, knowledge: characters.ChampionKnowledge) -> characters.Action:
+        return characters.Action.DO_NOTHING
+
+    def praise(self, score: int) -> None:
+        pass
+
+    def reset(self, game_no: int, arena_description: arenas.ArenaDescription) -> None:
+        pass
+
+    @property
+    def name(self) -> str:
+        return self.learner_name
+
+    @property
+    def preferred_tabard(self) -> characters.Tabard:
+        return self.tabard
+
+
+class GameSession:
+    """ Games played one after another by the learner, each paused at every decision of its champion. """
+
+    def __init__(
+            self,
+            arena_names: list[str],
+            opponents: list[controller.Controller],
+            rng: random.Random,
+            visibility_engine: str = visibility.DEFAULT_ENGINE,
+    ) -> None:
+        self.arena_names: list[str] = arena_names
+        # Games played side by side must not share the state of their controllers.
+        self.opponents: list[controller.Controller] = copy.deepcopy(opponents)
+        self.learner: LearnerController = LearnerController()
+        self.rng: random.Random = rng
+        self.visibility_engine: str = visibility_engine
+        self.encoder: observations.ObservationEncoder = observations.ObservationEncoder(
+            observations.arenas_size(arena_names)
+        )
+        self.games_played: int = 0
+        self.game: Optional[games.Game] = None
+        self.champion: Optional[characters.Champion] = None
+
+    def reset(self) -> None:
+        # A champion killed before its first decision leaves the learner nothing to play.
+        while True:
+            game_rng = random.Random(self.rng.getrandbits(64))
+            controllers = [self.learner, *self.opponents]
+            game_rng.shuffle(controllers)
+            self.game = games.Game(
+                game_no=self.games_played,
+                arena_name=game_rng.choice(self.arena_names),
+                to_spawn=controllers,
+                visibility_engine=self.visibility_engine,
+                rng=game_rng,
+            )
+            self.games_played += 1
+            self.champion = next(c for c in self.game.champions if c.controller is self.learner)
+            self.encoder.reset()
+            self.game.play_headless(self.champion)
+            if not self.game.finished:
+                return
+            self._praise_opponents()
+
+    def step(self, action: characters.Action) -> tuple[float, bool]:
+        """ Plays the action and the game up to the next decision. Returns the reward and whether the game ended. """
+        self.game.play_headless(self.champion, action)
+        if not self.game.finished:
+            return 0.0, False
+        self._praise_opponents()
+        return float(self.score()), True
+
+    def observe(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        return self.encoder.encode(self.champion, out)
+
+    def score(self) -> int:
+        return self.game.score()[self.learner]
+
+    def final_info(self) -> dict[str, Any]:
+        return {'score': self.score(), 'arena': self.game.arena.name, 'episodes': self.game.episode}
+
+    def _praise_opponents(self) -> None:
+        for dead_controller, score in self.game.score().items():
+            if dead_controller is self.learner:
+                continue
+            try:
+                dead_controller.praise(score)
+            except Exception as e:
+                verbose_logger.warning(f"Controller {dead_controller.name} throw an unexpected exception: {repr(e)}.")
+                controller.ControllerExceptionReport(dead_controller.name, repr(e)).log(logging.WARN)
@@ -0,0 +1,469 @@
+"""
+A compact binary form of the json event log.
+
+A log starts with `MAGIC`, the format version and the time it was opened. Then follow records, each starting
+with its kind. Strings (event types, field names, controller and weapon names, severities and source lines)
+are interned: a STRING record defines each of them once and later records refer to them by number. A SCHEMA
+record defines the fields of an event type, and how each of them is encoded, before its first event.
+An EVENT record holds the schema number, the severity, the source line, the milliseconds passed since
+the previous event and the field values. All numbers are (zigzag) varints, so most of them take one byte.
+A SYNC record before each game start forgets all strings and schemas, so every game can be decoded on its own.
+"""
+from __future__ import annotations
+from collections.abc import Collection, Iterator
+import dataclasses
+import logging
+import struct
+import time
+import typing
+from typing import Any, BinaryIO, NamedTuple, Optional
+
+from gupb.logger import index as logger_index
+from gupb.model import coordinates
+
+MAGIC: bytes = b'GUPBLOG\x00'
+FORMAT_VERSION: int = 1
+
+STRING_RECORD: int = 0
+SCHEMA_RECORD: int = 1
+EVENT_RECORD: int = 2
+UTC_OFFSET_RECORD: int = 3
+SYNC_RECORD: int = 4
+
+STRING_FIELD: int = 0
+INT_FIELD: int = 1
+COORDS_FIELD: int = 2
+ANY_FIELD: int = 3
+
+# Tags of the self-describing encoding of ANY_FIELD values, which may hold lists and nested reports.
+NONE_VALUE, FALSE_VALUE, TRUE_VALUE, INT_VALUE, FLOAT_VALUE, STRING_VALUE, LIST_VALUE, DICT_VALUE = range(8)
+
+FLOAT = struct.Struct('<d')
+
+READ_CHUNK_SIZE: int = 1 << 20
+
+
+class BinaryLogError(Exception):
+    pass
+
+
+class IncompleteRecord(Exception):
+    pass
+
+
+def write_varint(buffer: bytearray, value: int) -> None:
+    while value >= 0x80:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def write_signed(buffer: bytearray, value: int) -> None:
+    write_varint(buffer, value << 1 if value >= 0 else (-value << 1) - 1)
+
+
+def read_byte(data: bytes, position: int) -> tuple[int, int]:
+    if position >= len(data):
+        raise IncompleteRecord()
+    return data[position], position + 1
+
+
+def read_varint(data: bytes, position: int) -> tuple[int, int]:
+    try:
+        byte = data[position]
+        if byte < 0x80:
+            return byte, position + 1
+        value, shift = byte & 0x7f, 7
+        while True:
+            position += 1
+            byte = data[position]
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return value, position + 1
+            shift += 7
+    except IndexError:
+        raise IncompleteRecord() from None
+
+
+def read_signed(data: bytes, position: int) -> tuple[int, int]:
+    value, position = read_varint(data, position)
+    return (value >> 1) ^ -(value & 1), position
+
+
+def field_kind(type_hint: Any) -> int:
+    if type_hint is str:
+        return STRING_FIELD
+    if type_hint is int:
+        return INT_FIELD
+    if type_hint is coordinates.Coords:
+        return COORDS_FIELD
+    return ANY_FIELD
+
+
+class Schema(NamedTuple):
+    number: int
+    event_type: str
+    fields: tuple[tuple[str, int], ...]
+
+
+class Encoder:
+    """ Turns logged reports into records, remembering which strings and schemas were already written. """
+
+    def __init__(self, opened_at_ms: int) -> None:
+        self.strings: dict[str, int] = {}
+        self.schemas: dict[type, Schema] = {}
+        self.last_ms: int = opened_at_ms
+        self.utc_offset: Optional[int] = None
+        self.utc_offset_hour: Optional[int] = None
+
+    @staticmethod
+    def header(opened_at_ms: int) -> bytes:
+        buffer = bytearray(MAGIC)
+        write_varint(buffer, FORMAT_VERSION)
+        write_varint(buffer, opened_at_ms)
+        return bytes(buffer)
+
+    def sync(self, record: logging.LogRecord) -> bytearray:
+        self.strings.clear()
+        self.schemas.clear()
+        self.utc_offset = self.utc_offset_hour = None
+        self.last_ms = int(record.created) * 1000 + int(record.msecs)
+        buffer = bytearray([SYNC_RECORD])
+        write_varint(buffer, self.last_ms)
+        return buffer
+
+    def string(self, definitions: bytearray, value: str) -> int:
+        number = self.strings.get(value)
+        if number is None:
+            number = len(self.strings)
+            self.strings[value] = number
+            encoded = value.encode('utf-8')
+            definitions.append(STRING_RECORD)
+            write_varint(definitions, len(encoded))
+            definitions += encoded
+        return number
+
+    def schema(self, definitions: bytearray, report_type: type) -> Schema:
+        schema = self.schemas.get(report_type)
+        if schema is None:
+            type_hints = typing.get_type_hints(report_type)
+            fields = tuple(
+                (field.name, field_kind(type_hints[field.name])) for field in dataclasses.fields(report_type)
+            )
+            schema = Schema(len(self.schemas), report_type.__name__, fields)
+            event_type = self.string(definitions, schema.event_type)
+            names = [self.string(definitions, name) for name, _ in fields]
+            definitions.append(SCHEMA_RECORD)
+            write_varint(definitions, event_type)
+            write_varint(definitions, len(fields))
+            for name, (_, kind) in zip(names, fields):
+                write_varint(definitions, name)
+                definitions.append(kind)
+            self.schemas[report_type] = schema
+        return schema
+
+    def value(self, definitions: bytearray, values: bytearray, value: Any) -> None:
+        if value is None:
+            values.append(NONE_VALUE)
+        elif value is True or value is False:
+            values.append(TRUE_VALUE if value else FALSE_VALUE)
+        elif isinstance(value, int):
+            values.append(INT_VALUE)
+            write_signed(values, value)
+        elif isinstance(value, float):
+            values.append(FLOAT_VALUE)
+            values += FLOAT.pack(value)
+        elif isinstance(value, str):
+            values.append(STRING_VALUE)
+            write_varint(values, self.string(definitions, value))
+        elif isinstance(value, (list, tuple)):
+            values.append(LIST_VALUE)
+            write_varint(values, len(value))
+            for item in value:
+                self.value(definitions, values, item)
+        elif isinstance(value, dict):
+            values.append(DICT_VALUE)
+            write_varint(values, len(value))
+            for key, item in value.items():
+                write_varint(values, self.string(definitions, str(key)))
+                self.value(definitions, values, item)
+        else:
+            raise BinaryLogError(f"Unable to encode a value of type {type(value).__name__}.")
+
+    def event(self, record: logging.LogRecord) -> tuple[bytearray, int]:
+        """ Returns the records to write and where the event record starts among them. """
+        report = record.report
+        definitions, values = bytearray(), bytearray()
+        milliseconds = int(record.created) * 1000 + int(record.msecs)
+        if milliseconds // 3_600_000 != self.utc_offset_hour:
+            self.utc_offset_hour = milliseconds // 3_600_000
+            utc_offset = time.localtime(record.created).tm_gmtoff
+            if utc_offset != self.utc_offset:
+                self.utc_offset = utc_offset
+                definitions.append(UTC_OFFSET_RECORD)
+                write_signed(definitions, utc_offset)
+        schema = self.schema(definitions, type(report))
+        severity = self.string(definitions, record.levelname)
+        line = self.string(definitions, f'{record.module}.{record.funcName}:{record.lineno}')
+        any_values = None
+        for name, kind in schema.fields:
+            value = getattr(report, name)
+            if kind == STRING_FIELD:
+                write_varint(values, self.string(definitions, value))
+            elif kind == INT_FIELD:
+                write_signed(values, value)
+            elif kind == COORDS_FIELD:
+                write_signed(values, value[0])
+                write_signed(values, value[1])
+            else:
+                any_values = report.to_dict(encode_json=False) if any_values is None else any_values
+                self.value(definitions, values, any_values[name])
+        event_start = len(definitions)
+        definitions.append(EVENT_RECORD)
+        write_varint(definitions, schema.number)
+        write_varint(definitions, severity)
+        write_varint(definitions, line)
+        write_signed(definitions, milliseconds - self.last_ms)
+        self.last_ms = milliseconds
+        definitions += values
+        return definitions, event_start
+
+
+class BinaryEventHandler(logging.Handler):
+    """ Writes the reports logged to the json logger in the binary format, other records are ignored. """
+
+    def __init__(self, filename: str, indexed: bool = True) -> None:
+        super().__init__()
+        self.filename: str = filename
+        self.stream: BinaryIO = open(filename, 'wb')
+        opened_at_ms = int(time.time() * 1000)
+        header = Encoder.header(opened_at_ms)
+        self.stream.write(header)
+        self.position: int = len(header)
+        self.encoder: Encoder = Encoder(opened_at_ms)
+        self.index: Optional[logger_index.IndexWriter] = logger_index.IndexWriter(filename) if indexed else None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if not hasattr(record, 'report'):
+            return
+        try:
+            sync_offset = None
+            if record.event_type == logger_index.GAME_START_TYPE:
+                sync = self.encoder.sync(record)
+                sync_offset = self.position
+                self.stream.write(sync)
+                self.position += len(sync)
+            records, event_start = self.encoder.event(record)
+            if self.index is not None:
+                self.index.observe(record, self.position + event_start, sync_offset)
+            self.stream.write(records)
+            self.position += len(records)
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            if not self.stream.closed:
+                self.stream.flush()
+                if self.index is not None:
+                    self.index.flush()
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        self.acquire()
+        try:
+            if not self.stream.closed:
+                self.stream.close()
+                if self.index is not None:
+                    self.index.close()
+        finally:
+            self.release()
+            super().close()
+
+
+class Decoder:
+    """ Reads records back into the dicts a line of the json log parses to. """
+
+    def __init__(self, opened_at_ms: int, event_types: Optional[Collection[str]] = None) -> None:
+        self.event_types: Optional[frozenset[str]] = frozenset(event_types) if event_types is not None else None
+        self.strings: list[str] = []
+        self.schemas: list[tuple[str, tuple[tuple[str, int], ...], bool]] = []
+        self.last_ms: int = opened_at_ms
+        self.utc_offset: int = 0
+        self.second: Optional[int] = None
+        self.second_text: str = ''
+
+    @staticmethod
+    def header(data: bytes) -> tuple[int, int]:
+        if data[:len(MAGIC)] != MAGIC:
+            raise BinaryLogError("Not a binary event log.")
+        version, position = read_varint(data, len(MAGIC))
+        if version != FORMAT_VERSION:
+            raise BinaryLogError(f"Unsupported binary event log version {version}.")
+        return read_varint(data, position)
+
+    def value(self, data: bytes, position: int) -> tuple[Any, int]:
+        tag, position = read_byte(data, position)
+        if tag == NONE_VALUE:
+            return None, position
+        if tag == FALSE_VALUE or tag == TRUE_VALUE:
+            return tag == TRUE_VALUE, position
+        if tag == INT_VALUE:
+            return read_signed(data, position)
+        if tag == FLOAT_VALUE:
+            if position + FLOAT.size > len(data):
+                raise IncompleteRecord()
+            return FLOAT.unpack_from(data, position)[0], position + FLOAT.size
+        if tag == STRING_VALUE:
+            number, position = read_varint(data, position)
+            return self.strings[number], position
+        if tag == LIST_VALUE:
+            length, position = read_varint(data, position)
+            items = []
+            for _ in range(length):
+                item, position = self.value(data, position)
+                items.append(item)
+            return items, position
+        if tag == DICT_VALUE:
+            length, position = read_varint(data, position)
+            items = {}
+            for _ in range(length):
+                key, position = read_varint(data, position)
+                items[self.strings[key]], position = self.value(data, position)
+            return items, position
+        raise BinaryLogError(f"Unknown value tag {tag}.")
+
+    def time_stamp(self, milliseconds: int) -> str:
+        second = milliseconds // 1000
+        if second != self.second:
+            self.second = second
+            self.second_text = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(second + self.utc_offset))
+        return f'{self.second_text},{milliseconds % 1000:03d}'
+
+    def record(self, data: bytes, position: int) -> tuple[Optional[dict[str, Any]], int]:
+        """ Decodes the record at the position, returning the event if it was one. """
+        kind, position = read_byte(data, position)
+        if kind == EVENT_RECORD:
+            schema, position = read_varint(data, position)
+            severity, position = read_varint(data, position)
+            line, position = read_varint(data, position)
+            elapsed, position = read_signed(data, position)
+            event_type, fields, wanted = self.schemas[schema]
+            if not wanted:
+                for _, field in fields:
+                    if field == ANY_FIELD:
+                        _, position = self.value(data, position)
+                    else:
+                        _, position = read_varint(data, position)
+                        if field == COORDS_FIELD:
+                            _, position = read_varint(data, position)
+                self.last_ms += elapsed
+                return None, position
+            value = {}
+            for name, field in fields:
+                if field == STRING_FIELD:
+                    number, position = read_varint(data, position)
+                    value[name] = self.strings[number]
+                elif field == INT_FIELD:
+                    value[name], position = read_signed(data, position)
+                elif field == COORDS_FIELD:
+                    x, position = read_signed(data, position)
+                    y, position = read_signed(data, position)
+                    value[name] = [x, y]
+                else:
+                    value[name], position = self.value(data, position)
+            self.last_ms += elapsed
+            return {
+                'time_stamp': self.time_stamp(self.last_ms),
+                'severity': self.strings[severity],
+                'line': self.strings[line],
+                'type': event_type,
+                'value': value,
+            }, position
+        if kind == STRING_RECORD:
+            length, position = read_varint(data, position)
+            if position + length > len(data):
+                raise IncompleteRecord()
+            self.strings.append(data[position:position + length].decode('utf-8'))
+            return None, position + length
+        if kind == SCHEMA_RECORD:
+            event_type, position = read_varint(data, position)
+            fields_no, position = read_varint(data, position)
+            fields = []
+            for _ in range(fields_no):
+                name, position = read_varint(data, position)
+                kind, position = read_byte(data, position)
+                fields.append((self.strings[name], kind))
+            event_type = self.strings[event_type]
+            wanted = self.event_types is None or event_type in self.event_types
+            self.schemas.append((event_type, tuple(fields), wanted))
+            return None, position
+        if kind == SYNC_RECORD:
+            self.last_ms, position = read_varint(data, position)
+            self.strings, self.schemas, self.second = [], [], None
+            return None, position
+        if kind == UTC_OFFSET_RECORD:
+            utc_offset, position = read_signed(data, position)
+            self.utc_offset, self.second = utc_offset, None
+            return None, position
+        raise BinaryLogError(f"Unknown record kind {kind}.")
+
+
+def read_records(
+        path: str,
+        event_types: Optional[Collection[str]] = None,
+        offset: Optional[int] = None,
+) -> Iterator[tuple[int, int, dict[str, Any]]]:
+    """
+    Streams the events of a binary log as the dicts the lines of the json log parse to, optionally only those
+    of the given event types, together with the offsets of their records and of the SYNC record before them.
+    Reading may start at the offset of a SYNC record instead of the beginning of the log. A record cut short
+    at the end of the file, e.g. of a log that is still being written, is left out. A record referring to
+    a string or schema that was never defined raises `BinaryLogError`.
+    """
+    with open(path, 'rb') as file:
+        if offset is None:
+            data = file.read(READ_CHUNK_SIZE)
+            try:
+                opened_at_ms, position = Decoder.header(data)
+            except IncompleteRecord:
+                raise BinaryLogError("Not a binary event log.")
+            base = 0
+        else:
+            file.seek(offset)
+            data = file.read(READ_CHUNK_SIZE)
+            if data[:1] != bytes([SYNC_RECORD]):
+                raise BinaryLogError(f"No game starts at offset {offset}.")
+            opened_at_ms, position, base = 0, 0, offset
+        decoder = Decoder(opened_at_ms, event_types)
+        sync_offset = base
+        end_of_file = False
+        while True:
+            try:
+                while position < len(data):
+                    kind = data[position]
+                    event, next_position = decoder.record(data, position)
+                    if kind == SYNC_RECORD:
+                        sync_offset = base + position
+                    elif event is not None:
+                        yield base + position, sync_offset, event
+                    position = next_position
+            except IncompleteRecord:
+                pass
+            except IndexError:
+                raise BinaryLogError(
+                    f"The record at offset {base + position} refers to an undefined string or schema."
+                ) from None
+            if end_of_file:
+                return
+            chunk = file.read(READ_CHUNK_SIZE)
+            end_of_file = not chunk
+            data, position, base = data[position:] + chunk, 0, base + position
+
+
+def read_events(path: str, event_types: Optional[Collection[str]] = None) -> Iterator[dict[str, Any]]:
+    """ Streams the events of a binary log, see `read_records`. """
+    for _, _, event in read_records(path, event_types):
+        yield event
@@ -1,3 +1,5 @@
+from __future__ import annotations
+from collections.abc import Iterable
 import json
 import logging
 
@@ -6,6 +8,70 @@ from dataclasses_json import DataClassJsonMixin
 json_logger = logging.getLogger('json')
 
 
+class EventTypeFilter(logging.Filter):
+    """ Lets through only the given event types, so that a sink can ask for a part of the reports. """
+
+    def __init__(self, event_types: Iterable[str]) -> None:
+        super().__init__()
+        self.event_types: frozenset[str] = frozenset(event_types)
+
+    def accepts(self, event_type: str) -> bool:
+        return event_type in self.event_types
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return self.accepts(getattr(record, 'event_type', ''))
+
+
+def wants(event_type: str, level: int) -> bool:
+    # Mirrors the handler lookup of `logging.Logger.callHandlers`, without building a record.
+    if not json_logger.isEnabledFor(level):
+        return False
+    logger, found = json_logger, False
+    while logger:
+        for handler in logger.handlers:
+            found = True
+            if level >= handler.level and all(
+                    sink_filter.accepts(event_type)
+                    for sink_filter in handler.filters
+                    if isinstance(sink_filter, EventTypeFilter)
+            ):
+                return True
+        if not logger.propagate:
+            break
+        logger = logger.parent
+    return not found and logging.lastResort is not None and level >= logging.lastResort.level
+
+
+def disable_logging() -> None:
+    """ No-logging benchmark mode, every report and verbose message is dropped before it is built. """
+    logging.disable(logging.CRITICAL)
+
+
+class JsonMessage:
+    """ The json of a report, serialised only when a text sink formats the record. """
+    __slots__ = ('report',)
+
+    def __init__(self, report: LoggingMixin) -> None:
+        self.report: LoggingMixin = report
+
+    def __str__(self) -> str:
+        return json.dumps(self.report.to_dict())
+
+
 class LoggingMixin(DataClassJsonMixin):
     def log(self, level: int) -> None:
-        json_logger.log(level=level, msg=json.dumps(self.to_dict()), extra={'event_type': self.__class__.__name__})
+        if wants(self.__class__.__name__, level):
+            self._log(level)
+
+    @classmethod
+    def emit(cls, level: int, *args, **kwargs) -> None:
+        """ Builds and logs the report only if some sink wants it at this level. """
+        if wants(cls.__name__, level):
+            cls(*args, **kwargs)._log(level)
+
+    def _log(self, level: int) -> None:
+        json_logger.log(
+            level=level,
+            msg=JsonMessage(self),
+            extra={'event_type': self.__class__.__name__, 'report': self},
+        )
@@ -0,0 +1,154 @@
+"""
+A sidecar index of a json or binary event log, with the byte offset of every game start and episode start.
+Each entry also holds the offset reading has to start from: in a json log that is the entry itself, in
+a binary log it is the SYNC record before the start of the game.
+"""
+from __future__ import annotations
+from collections.abc import Collection, Iterator
+import json
+import logging
+import os
+from typing import Any, BinaryIO, Optional
+
+import numpy as np
+
+from gupb.logger import binary
+
+GAME_START_TYPE = 'GameStartReport'
+EPISODE_START_TYPE = 'EpisodeStartReport'
+
+# Entries of game starts have the episode number 0.
+INDEX_DTYPE = np.dtype([('game', '<u4'), ('episode', '<u4'), ('offset', '<u8'), ('sync_offset', '<u8')])
+
+
+class LogIndexError(Exception):
+    pass
+
+
+def index_path(log_path: str) -> str:
+    return f'{log_path}.index'
+
+
+def is_binary_log(log_path: str) -> bool:
+    return log_path.endswith('.gupblog')
+
+
+class IndexWriter:
+    def __init__(self, log_path: str, append: bool = False) -> None:
+        # In a binary log an episode can only be decoded from the start of its game.
+        self.episodes_sync_to_game: bool = is_binary_log(log_path)
+        self.game: int = 0
+        self.game_sync_offset: int = 0
+        if append:
+            entries = load(log_path)
+            if len(entries):
+                self.game, self.game_sync_offset = int(entries['game'][-1]), int(entries['sync_offset'][-1])
+        self.stream: BinaryIO = open(index_path(log_path), 'ab' if append else 'wb')
+
+    def observe(self, record: logging.LogRecord, offset: int, sync_offset: Optional[int] = None) -> None:
+        """ Adds an entry if the logged report starts a game or an episode. """
+        event_type = getattr(record, 'event_type', None)
+        if event_type == GAME_START_TYPE:
+            self.start_game(record.report.game_number, offset, sync_offset)
+        elif event_type == EPISODE_START_TYPE:
+            self.start_episode(record.report.episode_number, offset)
+
+    def start_game(self, game: int, offset: int, sync_offset: Optional[int] = None) -> None:
+        self.game = game
+        self.game_sync_offset = offset if sync_offset is None else sync_offset
+        self.write(game, 0, offset, self.game_sync_offset)
+
+    def start_episode(self, episode: int, offset: int) -> None:
+        self.write(self.game, episode, offset, self.game_sync_offset if self.episodes_sync_to_game else offset)
+
+    def write(self, game: int, episode: int, offset: int, sync_offset: int) -> None:
+        self.stream.write(np.array([(game, episode, offset, sync_offset)], dtype=INDEX_DTYPE).tobytes())
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+    def close(self) -> None:
+        self.stream.close()
+
+
+def type_marker(event_type: str) -> bytes:
+    return f'"type": "{event_type}"'.encode()
+
+
+def json_records(
+        log_path: str,
+        event_types: Optional[Collection[str]] = None,
+        offset: int = 0,
+) -> Iterator[tuple[int, dict[str, Any]]]:
+    """
+    Streams the events of a json log with the offsets of their lines, optionally only those of the given
+    event types. Lines of the other events are skipped by a substring check, without decoding their json.
+    """
+    markers = None if event_types is None else tuple(map(type_marker, event_types))
+    with open(log_path, 'rb') as file:
+        file.seek(offset)
+        for line in file:
+            if markers is None or any(map(line.__contains__, markers)):
+                event = json.loads(line)
+                if event_types is None or event['type'] in event_types:
+                    yield offset, event
+            offset += len(line)
+
+
+def json_events(log_path: str, event_types: Optional[Collection[str]] = None) -> Iterator[dict[str, Any]]:
+    return (event for _, event in json_records(log_path, event_types))
+
+
+def rebuild(log_path: str) -> np.ndarray:
+    """ Writes the index of an existing log anew in one pass over it. """
+    writer = IndexWriter(log_path)
+    try:
+        if is_binary_log(log_path):
+            records = binary.read_records(log_path, (GAME_START_TYPE, EPISODE_START_TYPE))
+        else:
+            records = (
+                (offset, None, event) for offset, event in json_records(log_path, (GAME_START_TYPE, EPISODE_START_TYPE))
+            )
+        for offset, sync_offset, event in records:
+            if event['type'] == GAME_START_TYPE:
+                writer.start_game(event['value']['game_number'], offset, sync_offset)
+            else:
+                writer.start_episode(event['value']['episode_number'], offset)
+    finally:
+        writer.close()
+    return load(log_path)
+
+
+def load(log_path: str) -> np.ndarray:
+    """ Reads the index of a log, building it first if the log has none. """
+    path = index_path(log_path)
+    if not os.path.exists(path):
+        return rebuild(log_path)
+    # An entry cut short by a log that is still being written is left out.
+    size = os.path.getsize(path) // INDEX_DTYPE.itemsize
+    return np.fromfile(path, dtype=INDEX_DTYPE, count=size)
+
+
+def find(index: np.ndarray, game: int, episode: int = 0) -> np.void:
+    found = np.flatnonzero((index['game'] == game) & (index['episode'] == episode))
+    if not len(found):
+        raise LogIndexError(f"There is no episode {episode} of game {game} in the log.")
+    return index[found[0]]
+
+
+def read_game(log_path: str, game: int, episode: int = 0) -> Iterator[dict[str, Any]]:
+    """ Streams the events of a game, or of a game from one of its episodes on, seeking straight to them. """
+    entry = find(load(log_path), game, episode)
+    offset, sync_offset = int(entry['offset']), int(entry['sync_offset'])
+    if is_binary_log(log_path):
+        records = (
+            (record_offset, event) for record_offset, _, event in binary.read_records(log_path, offset=sync_offset)
+        )
+    else:
+        records = json_records(log_path, offset=offset)
+    for record_offset, event in records:
+        if record_offset < offset:
+            continue
+        if event['type'] == GAME_START_TYPE and record_offset > offset:
+            return
+        yield event
@@ -0,0 +1,299 @@
+from __future__ import annotations
+import logging
+import pathlib
+import queue
+import threading
+import weakref
+from typing import BinaryIO, NamedTuple, Optional
+
+from gupb.logger import binary as logger_binary
+from gupb.logger import index as logger_index
+
+verbose_logger = logging.getLogger('verbose')
+
+DEFAULT_QUEUE_SIZE: int = 16384
+DEFAULT_BATCH_SIZE: int = 512
+DEFAULT_FLUSH_INTERVAL: float = 0.5
+
+OVERFLOW_POLICIES = {'block', 'drop'}
+
+GAME_LOGGERS = ('verbose', 'json')
+
+_STOP = object()
+
+_running_handlers: weakref.WeakSet[BatchingFileHandler] = weakref.WeakSet()
+
+
+class BatchingFileHandler(logging.Handler):
+    """
+    Appends records to a file from a background writer thread. The game loop only collects records into
+    a batch and hands full batches over a bounded queue. The writer formats and writes them, and hands a
+    partial batch over the queue as well once `flush_interval` seconds pass without a full one, so batches
+    are always written in the order they were collected. When `queue_size` records are waiting the producer
+    either blocks until the writer catches up ('block', the default backpressure) or the batch is dropped
+    and counted ('drop').
+    """
+
+    def __init__(
+            self,
+            filename: str,
+            queue_size: int = DEFAULT_QUEUE_SIZE,
+            batch_size: int = DEFAULT_BATCH_SIZE,
+            flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+            overflow: str = 'block',
+            indexed: bool = False,
+    ) -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow!r}, expected one of {sorted(OVERFLOW_POLICIES)}.")
+        super().__init__()
+        self.filename: str = filename
+        self.stream: BinaryIO = open(filename, 'ab')
+        self.position: int = self.stream.tell()
+        self.index: Optional[logger_index.IndexWriter] = (
+            logger_index.IndexWriter(filename, append=self.position > 0) if indexed else None
+        )
+        self.queue_size: int = queue_size
+        self.batch_size: int = batch_size
+        self.batches: queue.Queue = queue.Queue(maxsize=max(queue_size // batch_size, 1))
+        self.pending: list[logging.LogRecord] = []
+        self.flush_interval: float = flush_interval
+        self.overflow: str = overflow
+        self.dropped: int = 0
+        self.writer: Optional[threading.Thread] = threading.Thread(
+            target=self._write_batches, name=f'log-writer:{filename}', daemon=True,
+        )
+        self.writer.start()
+        _running_handlers.add(self)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # Called with the handler lock held, see `logging.Handler.handle`.
+        if self.writer is None:
+            # After a drain the records are written synchronously, so late messages are not lost.
+            self._write([record])
+            self.stream.flush()
+            return
+        self.pending.append(record)
+        if len(self.pending) >= self.batch_size:
+            self._hand_over()
+
+    def _hand_over(self) -> None:
+        batch, self.pending = self.pending, []
+        if self.overflow == 'block':
+            self.batches.put(batch)
+        else:
+            try:
+                self.batches.put_nowait(batch)
+            except queue.Full:
+                self.dropped += len(batch)
+
+    def _write_batches(self) -> None:
+        while True:
+            try:
+                batch = self.batches.get(timeout=self.flush_interval)
+            except queue.Empty:
+                # Batches are only handed over with the lock held, so the partial one queues up behind any
+                # full batch handed over before. A flush or drain holding the lock hands it over by itself.
+                if self.lock.acquire(blocking=False):
+                    try:
+                        if self.pending and not self.batches.full():
+                            self._hand_over()
+                    finally:
+                        self.lock.release()
+                continue
+            if batch is _STOP:
+                self.batches.task_done()
+                return
+            self._write(batch)
+            self.stream.flush()
+            self.batches.task_done()
+
+    def _write(self, records: list[logging.LogRecord]) -> None:
+        lines = []
+        for record in records:
+            try:
+                line = (self.format(record) + '\n').encode('utf-8')
+            except Exception:
+                self.handleError(record)
+                continue
+            if self.index is not None:
+                self.index.observe(record, self.position)
+            self.position += len(line)
+            lines.append(line)
+        if lines:
+            self.stream.write(b''.join(lines))
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            if self.writer is not None:
+                if self.pending:
+                    self._hand_over()
+                self.batches.join()
+            if self.index is not None:
+                self.index.flush()
+        finally:
+            self.release()
+
+    def drain(self) -> None:
+        """ Writes out everything collected so far and stops the writer thread. """
+        self.acquire()
+        try:
+            if self.writer is not None:
+                if self.pending:
+                    self._hand_over()
+                self.batches.put(_STOP)
+                self.writer.join()
+                self.writer = None
+            self.stream.flush()
+            if self.index is not None:
+                self.index.flush()
+        finally:
+            self.release()
+        if self.dropped:
+            verbose_logger.warning(f"{self.dropped} records for {self.filename} were dropped by a full logging queue.")
+            self.dropped = 0
+
+    def close(self) -> None:
+        self.acquire()
+        try:
+            if not self.stream.closed:
+                self.drain()
+                self.stream.close()
+                if self.index is not None:
+                    self.index.close()
+        finally:
+            self.release()
+            super().close()
+
+
+class IndexedFileHandler(logging.Handler):
+    """ Appends records to a file like `logging.FileHandler`, keeping the index of the games and episodes in it. """
+
+    def __init__(self, filename: str) -> None:
+        super().__init__()
+        self.filename: str = filename
+        self.stream: BinaryIO = open(filename, 'ab')
+        self.position: int = self.stream.tell()
+        self.index: logger_index.IndexWriter = logger_index.IndexWriter(filename, append=self.position > 0)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            line = (self.format(record) + '\n').encode('utf-8')
+            self.index.observe(record, self.position)
+            self.stream.write(line)
+            self.stream.flush()
+            self.position += len(line)
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            if not self.stream.closed:
+                self.stream.flush()
+                self.index.flush()
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        self.acquire()
+        try:
+            if not self.stream.closed:
+                self.stream.close()
+                self.index.close()
+        finally:
+            self.release()
+            super().close()
+
+
+def drain() -> None:
+    for handler in list(_running_handlers):
+        handler.drain()
+
+
+class GameLogSettings(NamedTuple):
+    """ Where and how the game loggers write, enough for a worker process to set up logs of its own. """
+    directory: str
+    stem: str
+    asynchronous: bool = False
+    binary: bool = False
+
+
+game_log_settings: Optional[GameLogSettings] = None
+
+
+def configure_game_logs(settings: GameLogSettings) -> None:
+    global game_log_settings
+    game_log_settings = settings
+    directory = pathlib.Path(settings.directory)
+
+    def file_handler(file_path: pathlib.Path) -> logging.Handler:
+        if settings.asynchronous:
+            return BatchingFileHandler(file_path.as_posix())
+        return logging.FileHandler(file_path.as_posix())
+
+    verbose_logger.propagate = False
+    verbose_file_handler = file_handler(directory / f'{settings.stem}.log')
+    verbose_formatter = logging.Formatter(
+        '%(asctime)s | %(levelname)s | %(module)s.%(funcName)s:%(lineno)d | %(message)s'
+    )
+    verbose_file_handler.setFormatter(verbose_formatter)
+    verbose_logger.addHandler(verbose_file_handler)
+    verbose_logger.setLevel(logging.DEBUG)
+
+    json_logger = logging.getLogger('json')
+    json_logger.propagate = False
+    if settings.binary:
+        json_file_path = directory / f'{settings.stem}.gupblog'
+        json_logger.addHandler(logger_binary.BinaryEventHandler(json_file_path.as_posix()))
+        json_logger.setLevel(logging.DEBUG)
+        return
+    json_file_path = directory / f'{settings.stem}.json'
+    if settings.asynchronous:
+        json_file_handler = BatchingFileHandler(json_file_path.as_posix(), indexed=True)
+    else:
+        json_file_handler = IndexedFileHandler(json_file_path.as_posix())
+    json_formatter = logging.Formatter(
+        '{"time_stamp": "%(asctime)s",'
+        ' "severity": "%(levelname)s",'
+        ' "line": "%(module)s.%(funcName)s:%(lineno)d",'
+        ' "type": "%(event_type)s",'
+        ' "value": %(message)s}'
+    )
+    json_file_handler.setFormatter(json_formatter)
+    json_logger.addHandler(json_file_handler)
+    json_logger.setLevel(logging.DEBUG)
+
+
+def worker_log_setup() -> tuple[Optional[GameLogSettings], int]:
+    """ What a worker process needs to log like this one, to be passed to `configure_worker_logs`. """
+    if game_log_settings is None and any(logging.getLogger(name).handlers for name in GAME_LOGGERS):
+        raise ValueError("Workers can only set up game logs configured with `configure_game_logs`.")
+    return game_log_settings, logging.root.manager.disable
+
+
+def configure_worker_logs(setup: tuple[Optional[GameLogSettings], int], tag: str) -> None:
+    """
+    Sets up the game logs of a worker process in files of its own, named after those of its parent and
+    the tag. Handlers inherited from a forked parent are dropped, their files still belong to the parent.
+    """
+    settings, disabled_level = setup
+    logging.disable(disabled_level)
+    for name in GAME_LOGGERS:
+        logger = logging.getLogger(name)
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            if isinstance(handler, BatchingFileHandler):
+                _running_handlers.discard(handler)
+    if settings is not None:
+        configure_game_logs(settings._replace(stem=f'{settings.stem}.{tag}'))
+
+
+def writers_running() -> bool:
+    return any(handler.writer is not None for handler in _running_handlers)
+
+
+def flush_game_logs() -> None:
+    for name in GAME_LOGGERS:
+        for handler in logging.getLogger(name).handlers:
+            handler.flush()
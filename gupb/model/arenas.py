@@ -1,18 +1,22 @@
 from __future__ import annotations
 from dataclasses import dataclass
+import glob
 import logging
 import os.path
 import random
 from enum import Enum, member
-from typing import Dict, NamedTuple, Optional
+from typing import Mapping, NamedTuple, Optional
 
-import bresenham
+import numpy as np
 
 from gupb.logger import core as logger_core
 from gupb.model import characters
+from gupb.model import compiled_arenas
 from gupb.model import coordinates
 from gupb.model import effects
+from gupb.model import terrains
 from gupb.model import tiles
+from gupb.model import visibility
 from gupb.model import weapons
 
 verbose_logger = logging.getLogger('verbose')
@@ -38,7 +42,7 @@ FIXED_MENHIRS = {
     'lone_sanctum': coordinates.Coords(9, 9),
 }
 
-Terrain = Dict[coordinates.Coords, tiles.Tile]
+Terrain = terrains.Terrain
 
 
 # noinspection PyMethodParameters
@@ -64,95 +68,162 @@ class ArenaDescription(NamedTuple):
     name: str
 
 
+class ArenaTemplate(NamedTuple):
+    signature: tuple[int, int]
+    codes: np.ndarray
+    loot: list[tuple[coordinates.Coords, type[weapons.Weapon]]]
+    menhir: Optional[coordinates.Coords]
+
+    def instantiate(self) -> Terrain:
+        terrain = Terrain.from_codes(self.codes)
+        for position, weapon_type in self.loot:
+            terrain[position].loot = weapon_type()
+        return terrain
+
+
+ARENA_TEMPLATES: dict[str, ArenaTemplate] = {}
+
+
+def arena_file_path(name: str) -> str:
+    return os.path.join('resources', 'arenas', f'{name}.gupb')
+
+
+def bundled_names() -> list[str]:
+    return sorted(os.path.splitext(os.path.basename(path))[0] for path in glob.glob(arena_file_path('*')))
+
+
+def file_signature(path: str) -> Optional[tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def parse_arena(name: str, signature: Optional[tuple[int, int]]) -> compiled_arenas.CompiledArena:
+    with open(arena_file_path(name)) as file:
+        lines = [line.rstrip('\n') for line in file.readlines()]
+    cells = [
+        (coordinates.Coords(x, y), character)
+        for y, line in enumerate(lines)
+        for x, character in enumerate(line)
+        if character in TILE_ENCODING or character in WEAPON_ENCODING
+    ]
+    size = (max(coords.x for coords, _ in cells) + 1, max(coords.y for coords, _ in cells) + 1)
+    codes = np.full((size[1], size[0]), terrains.VOID, dtype=np.int8)
+    loot = []
+    for position, character in cells:
+        if character in TILE_ENCODING:
+            codes[position.y, position.x] = terrains.tile_code(TILE_ENCODING[character])
+        else:
+            codes[position.y, position.x] = terrains.tile_code(tiles.Land)
+            loot.append((position, character))
+    codes.flags.writeable = False
+    return compiled_arenas.CompiledArena(name, signature, codes, loot, FIXED_MENHIRS.get(name))
+
+
+def compile_arena(name: str) -> str:
+    path = compiled_arenas.compiled_file_path(name)
+    compiled_arenas.write(path, parse_arena(name, file_signature(arena_file_path(name))))
+    return path
+
+
+def arena_template(name: str) -> ArenaTemplate:
+    # A compiled arena is used when it matches the current source file, or when there is no source file at all.
+    source_signature = file_signature(arena_file_path(name))
+    signature = source_signature or file_signature(compiled_arenas.compiled_file_path(name))
+    template = ARENA_TEMPLATES.get(name)
+    if template is None or template.signature != signature:
+        arena = compiled_arenas.load(name, source_signature) or parse_arena(name, source_signature)
+        template = ArenaTemplate(
+            signature,
+            arena.codes,
+            [(position, WEAPON_ENCODING[weapon]) for position, weapon in arena.loot],
+            arena.menhir,
+        )
+        ARENA_TEMPLATES[name] = template
+    return template
+
+
 class Arena:
-    def __init__(self, name: str, terrain: Terrain) -> None:
+    def __init__(
+            self,
+            name: str,
+            terrain: Mapping[coordinates.Coords, tiles.Tile],
+            visibility_engine: str = visibility.DEFAULT_ENGINE,
+            rng: Optional[random.Random] = None,
+    ) -> None:
         self.name = name
-        self.terrain: Terrain = terrain
-        self.tiles_with_instant_effects: set[tiles.Tile] = set()
-        self.size: tuple[int, int] = terrain_size(self.terrain)
+        self.rng: random.Random = rng if rng is not None else random.Random()
+        self.terrain: Terrain = terrain if isinstance(terrain, Terrain) else Terrain.from_mapping(terrain)
+        # Ordered by registration, so that simultaneous deaths do not depend on the memory layout.
+        self.tiles_with_instant_effects: dict[tiles.Tile, None] = {}
+        self.size: tuple[int, int] = self.terrain.size
+        self.visibility: visibility.VisibilityIndex = visibility.VisibilityIndex(self.terrain, visibility_engine)
         self.menhir_position: Optional[coordinates.Coords] = None
+        self.fixed_menhir: Optional[coordinates.Coords] = FIXED_MENHIRS.get(name)
+        self.menhir_distance: Optional[np.ndarray] = None
         self.mist_radius = int(self.size[0] * 2 ** 0.5) + 1
         self.no_of_champions_alive: int = 0
 
     @staticmethod
-    def load(name: str) -> Arena:
-        terrain = dict()
-        arena_file_path = os.path.join('resources', 'arenas', f'{name}.gupb')
-        with open(arena_file_path) as file:
-            for y, line in enumerate(file.readlines()):
-                for x, character in enumerate(line):
-                    if character != '\n':
-                        position = coordinates.Coords(x, y)
-                        if character in TILE_ENCODING:
-                            terrain[position] = TILE_ENCODING[character]()
-                        elif character in WEAPON_ENCODING:
-                            terrain[position] = tiles.Land()
-                            terrain[position].loot = WEAPON_ENCODING[character]()
-        return Arena(name, terrain)
+    def load(
+            name: str,
+            visibility_engine: str = visibility.DEFAULT_ENGINE,
+            rng: Optional[random.Random] = None,
+    ) -> Arena:
+        template = arena_template(name)
+        arena = Arena(name, template.instantiate(), visibility_engine, rng)
+        arena.fixed_menhir = template.menhir
+        return arena
 
     def description(self) -> ArenaDescription:
         return ArenaDescription(self.name)
 
     def empty_coords(self) -> list[coordinates.Coords]:
-        return sorted(set(coords for coords, tile in self.terrain.items() if tile.empty))
+        return list(self.terrain.free)
 
     def visible_coords(self, champion: characters.Champion) -> set[coordinates.Coords]:
-        def estimate_border_point() -> tuple[coordinates.Coords, int]:
-            if champion.facing == characters.Facing.UP:
-                return coordinates.Coords(champion.position.x, 0), champion.position[1]
-            elif champion.facing == characters.Facing.RIGHT:
-                return coordinates.Coords(self.size[0] - 1, champion.position.y), self.size[0] - champion.position[0]
-            elif champion.facing == characters.Facing.DOWN:
-                return coordinates.Coords(champion.position.x, self.size[1] - 1), self.size[1] - champion.position.y
-            elif champion.facing == characters.Facing.LEFT:
-                return coordinates.Coords(0, champion.position.y), champion.position[0]
-
-        def champion_left_and_right() -> list[coordinates.Coords]:
-            if champion.facing == characters.Facing.UP or champion.facing == characters.Facing.DOWN:
-                return [
-                    coordinates.Coords(champion.position.x + 1, champion.position.y),
-                    coordinates.Coords(champion.position.x - 1, champion.position.y),
-                ]
-            elif champion.facing == characters.Facing.LEFT or champion.facing == characters.Facing.RIGHT:
-                return [
-                    coordinates.Coords(champion.position.x, champion.position.y + 1),
-                    coordinates.Coords(champion.position.x, champion.position.y - 1),
-                ]
-
-        visible = set()
-        visible.add(champion.position)
-        prescience = champion.weapon.prescience(champion.position, champion.facing)
-        if len(prescience) > 0:
-            for coords in prescience:
-                if coords in self.terrain:
-                    visible.add(coords)
+        prescience = champion.weapon.prescience_cells(self.terrain, champion.position, champion.facing)
+        if prescience is not None:
+            visible = set(map(self.terrain.cell_coords.__getitem__, prescience.tolist()))
+            visible.add(champion.position)
         else:
-            border, distance = estimate_border_point()
-            left = champion.facing.turn_left().value
-            targets = [border + coordinates.Coords(i * left.x, i * left.y) for i in range(-distance, distance + 1)]
-            for coords in targets:
-                ray = bresenham.bresenham(champion.position.x, champion.position.y, coords[0], coords[1])
-                next(ray)
-                for ray_coords in ray:
-                    if ray_coords not in self.terrain:
-                        break
-                    visible.add(ray_coords)
-                    if not self.terrain[ray_coords].transparent:
-                        break
-            visible.update(champion_left_and_right())
+            visible = self.visibility.cone(champion.position, champion.facing)
+            visible.add(champion.position)
+            cell = self.terrain.cell(champion.position)
+            for side in (champion.facing.turn_left(), champion.facing.turn_right()):
+                side_cell = self.terrain.neighbours[side.value][cell]
+                if self.terrain.has_cell(side_cell):
+                    visible.add(self.terrain.cell_coords[side_cell])
         return visible
 
+    def visible_cells(self, champion: characters.Champion) -> np.ndarray:
+        """ Cell numbers of the `visible_coords`, some possibly repeated. """
+        cell = self.terrain.cell(champion.position)
+        prescience = champion.weapon.prescience_cells(self.terrain, champion.position, champion.facing)
+        if prescience is not None:
+            return np.append(prescience, cell)
+        cells = [cell]
+        for side in (champion.facing.turn_left(), champion.facing.turn_right()):
+            side_cell = self.terrain.neighbours[side.value][cell]
+            if self.terrain.has_cell(side_cell):
+                cells.append(side_cell)
+        return np.concatenate((self.visibility.cone_cells(champion.position, champion.facing), cells))
+
     def visible_tiles(self, champion: characters.Champion) -> dict[coordinates.Coords, tiles.TileDescription]:
         return {coords: self.terrain[coords].description() for coords in self.visible_coords(champion)}
 
     def step(self, champion: characters.Champion, step_direction: StepDirection) -> None:
-        new_position = champion.position + step_direction.value(champion.facing).value
-        if self.terrain[new_position].passable:
+        direction = step_direction.value(champion.facing)
+        cell = self.terrain.neighbours[direction.value][self.terrain.cell(champion.position)]
+        if cell != terrains.NO_CELL and self.terrain.passable_flat[cell]:
+            new_position = self.terrain.cell_coords[cell]
             self.terrain[champion.position].leave(champion)
             champion.position = new_position
             self.terrain[champion.position].enter(champion)
-            verbose_logger.debug(f"Champion {champion.controller.name} entered tile {new_position}.")
-            ChampionEnteredTileReport(champion.controller.name, new_position).log(logging.DEBUG)
+            verbose_logger.debug("Champion %s entered tile %s.", champion.controller.name, new_position)
+            ChampionEnteredTileReport.emit(logging.DEBUG, champion.controller.name, new_position)
 
     def stay(self, champion: characters.Champion) -> None:
         self.terrain[champion.position].stay()
@@ -160,12 +231,19 @@ class Arena:
     def spawn_menhir(self, new_position: Optional[coordinates.Coords] = None) -> None:
         if self.menhir_position:
             self.terrain[self.menhir_position] = tiles.Land()
-        new_position = random.sample(self.empty_coords(), 1)[0] if new_position is None else new_position
-        new_position = FIXED_MENHIRS[self.name] if self.name in FIXED_MENHIRS else new_position
+        new_position = self.rng.sample(self.terrain.free, 1)[0] if new_position is None else new_position
+        new_position = self.fixed_menhir if self.fixed_menhir is not None else new_position
         self.menhir_position = new_position
         self.terrain[self.menhir_position] = tiles.Menhir()
-        verbose_logger.debug(f"Menhir spawned at {self.menhir_position}.")
-        MenhirSpawnedReport(self.menhir_position).log(logging.DEBUG)
+        self._prepare_mist_field()
+        verbose_logger.debug("Menhir spawned at %s.", self.menhir_position)
+        MenhirSpawnedReport.emit(logging.DEBUG, self.menhir_position)
+
+    def _prepare_mist_field(self) -> None:
+        ys, xs = np.indices(self.terrain.codes.shape)
+        squared_distance = (xs - self.menhir_position.x) ** 2 + (ys - self.menhir_position.y) ** 2
+        self.menhir_distance = np.sqrt(squared_distance).astype(int)
+        self.terrain.mist = terrains.MistField(self.menhir_distance, self.mist_radius)
 
     def spawn_champion_at(self, coords: coordinates.Coords) -> characters.Champion:
         champion = characters.Champion(coords, self)
@@ -176,24 +254,21 @@ class Arena:
     def increase_mist(self) -> None:
         self.mist_radius -= 1 if self.mist_radius > 0 else self.mist_radius
         if self.mist_radius:
-            verbose_logger.debug(f"Radius of mist-free space decreased to {self.mist_radius}.")
-            MistRadiusReducedReport(self.mist_radius).log(logging.DEBUG)
-            for coords in self.terrain:
-                distance = int(((coords.x - self.menhir_position.x) ** 2 +
-                                (coords.y - self.menhir_position.y) ** 2) ** 0.5)
-                if distance == self.mist_radius:
-                    self.register_effect(effects.Mist(), coords)
+            verbose_logger.debug("Radius of mist-free space decreased to %s.", self.mist_radius)
+            MistRadiusReducedReport.emit(logging.DEBUG, self.mist_radius)
+        if self.terrain.mist is not None:
+            self.terrain.mist.radius = self.mist_radius
 
     def register_effect(self, effect: effects.Effect, coords: coordinates.Coords) -> None:
         tile = self.terrain[coords]
-        tile.effects.add(effect)
+        tile.add_effect(effect)
         if effect.lifetime() == effects.EffectLifetime.INSTANT:
-            self.tiles_with_instant_effects.add(tile)
+            self.tiles_with_instant_effects[tile] = None
 
     def trigger_instants(self) -> None:
         for tile in self.tiles_with_instant_effects:
             tile.instant()
-        self.tiles_with_instant_effects = set()
+        self.tiles_with_instant_effects = {}
 
 
 def terrain_size(terrain: Terrain) -> tuple[int, int]:
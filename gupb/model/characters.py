@@ -58,8 +58,13 @@ class Tabard(Enum):
 
 
 class Champion:
+    __slots__ = (
+        'facing', 'weapon', 'health', 'position', 'arena', 'controller', 'tabard',
+        'previous_facing', 'previous_position', 'time_idle',
+    )
+
     def __init__(self, starting_position: coordinates.Coords, arena: arenas.Arena) -> None:
-        self.facing: Facing = Facing.random()
+        self.facing: Facing = Facing.random(arena.rng)
         self.weapon: weapons.Weapon = weapons.Knife()
         self.health: int = CHAMPION_STARTING_HP
         self.position: coordinates.Coords = starting_position
@@ -80,13 +85,14 @@ class Champion:
     def verbose_name(self) -> str:
         return self.controller.name if self.controller else "NULL_CONTROLLER"
 
-    def act(self) -> None:
+    def act(self, action: Optional[Action] = None) -> None:
+        # An action chosen outside of the game is played without asking the controller.
         if self.alive:
-            verbose_logger.debug(f"Champion {self.verbose_name()} starts acting.")
+            verbose_logger.debug("Champion %s starts acting.", self.verbose_name())
             self.store_previous_state()
-            action = self.pick_action()
-            verbose_logger.debug(f"Champion {self.verbose_name()} picked action {action}.")
-            ChampionPickedActionReport(self.verbose_name(), action.name).log(logging.DEBUG)
+            action = self.pick_action() if action is None else action
+            verbose_logger.debug("Champion %s picked action %s.", self.verbose_name(), action)
+            ChampionPickedActionReport.emit(logging.DEBUG, self.verbose_name(), action.name)
             action(self)
             self.arena.stay(self)
             self.assess_idle_penalty()
@@ -101,8 +107,8 @@ class Champion:
         else:
             self.time_idle = 0
         if self.time_idle >= PENALISED_IDLE_TIME:
-            verbose_logger.debug(f"Champion {self.verbose_name()} penalised for idle time.")
-            IdlePenaltyReport(self.verbose_name()).log(logging.DEBUG)
+            verbose_logger.debug("Champion %s penalised for idle time.", self.verbose_name())
+            IdlePenaltyReport.emit(logging.DEBUG, self.verbose_name())
             self.damage(IDLE_DAMAGE_PENALTY)
 
     # noinspection PyBroadException
@@ -128,13 +134,13 @@ class Champion:
 
     def turn_left(self) -> None:
         self.facing = self.facing.turn_left()
-        verbose_logger.debug(f"Champion {self.controller.name} is now facing {self.facing}.")
-        ChampionFacingReport(self.controller.name, self.facing.value).log(logging.DEBUG)
+        verbose_logger.debug("Champion %s is now facing %s.", self.controller.name, self.facing)
+        ChampionFacingReport.emit(logging.DEBUG, self.controller.name, self.facing.value)
 
     def turn_right(self) -> None:
         self.facing = self.facing.turn_right()
-        verbose_logger.debug(f"Champion {self.controller.name} is now facing {self.facing}.")
-        ChampionFacingReport(self.controller.name, self.facing.value).log(logging.DEBUG)
+        verbose_logger.debug("Champion %s is now facing %s.", self.controller.name, self.facing)
+        ChampionFacingReport.emit(logging.DEBUG, self.controller.name, self.facing.value)
 
     def step_forward(self) -> None:
         self.arena.step(self, arenas.StepDirection.FORWARD)
@@ -150,8 +156,8 @@ class Champion:
 
     def attack(self) -> None:
         self.weapon.cut(self.arena, self.position, self.facing)
-        verbose_logger.debug(f"Champion {self.controller.name} attacked with its {self.weapon.description().name}.")
-        ChampionAttackReport(self.controller.name, self.weapon.description().name).log(logging.DEBUG)
+        verbose_logger.debug("Champion %s attacked with its %s.", self.controller.name, self.weapon.description().name)
+        ChampionAttackReport.emit(logging.DEBUG, self.controller.name, self.weapon.description().name)
 
     def do_nothing(self) -> None:
         pass
@@ -159,8 +165,9 @@ class Champion:
     def damage(self, wounds: int) -> None:
         self.health -= wounds
         self.health = self.health if self.health > 0 else 0
-        verbose_logger.debug(f"Champion {self.controller.name} took {wounds} wounds, it has now {self.health} hp left.")
-        ChampionWoundsReport(self.controller.name, wounds, self.health).log(logging.DEBUG)
+        verbose_logger.debug(
+            "Champion %s took %s wounds, it has now %s hp left.", self.controller.name, wounds, self.health)
+        ChampionWoundsReport.emit(logging.DEBUG, self.controller.name, wounds, self.health)
         if not self.alive:
             self.die()
 
@@ -168,8 +175,8 @@ class Champion:
         self.arena.terrain[self.position].character = None
         self.arena.terrain[self.position].consumable = consumables.Potion()
         self.arena.terrain[self.position].loot = self.weapon if self.weapon.droppable() else None
-        verbose_logger.debug(f"Champion {self.controller.name} died.")
-        ChampionDeathReport(self.controller.name).log(logging.DEBUG)
+        verbose_logger.debug("Champion %s died.", self.controller.name)
+        ChampionDeathReport.emit(logging.DEBUG, self.controller.name)
 
         die_callable = getattr(self.controller, "die", None)
         if die_callable and callable(die_callable):
@@ -187,8 +194,8 @@ class Facing(Enum):
     RIGHT = coordinates.Coords(1, 0)
 
     @staticmethod
-    def random() -> Facing:
-        return random.choice([Facing.UP, Facing.DOWN, Facing.LEFT, Facing.RIGHT])
+    def random(rng: Optional[random.Random] = None) -> Facing:
+        return (rng if rng is not None else random).choice([Facing.UP, Facing.DOWN, Facing.LEFT, Facing.RIGHT])
 
     def turn_left(self) -> Facing:
         if self == Facing.UP:
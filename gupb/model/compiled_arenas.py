@@ -0,0 +1,96 @@
+from __future__ import annotations
+import mmap
+import os
+import struct
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from gupb.model import coordinates
+
+MAGIC: bytes = b'GUPBARNA'
+FORMAT_VERSION: int = 1
+NO_MENHIR: int = -1
+
+# magic, format version, width, height, source mtime (ns), source size, loot count, menhir x, menhir y, name length
+HEADER = struct.Struct('<8sIIIqqIiiI')
+LOOT_DTYPE = np.dtype([('x', '<i4'), ('y', '<i4'), ('weapon', 'u1')])
+
+
+class CompiledArena(NamedTuple):
+    name: str
+    signature: Optional[tuple[int, int]]
+    codes: np.ndarray
+    loot: list[tuple[coordinates.Coords, str]]
+    menhir: Optional[coordinates.Coords]
+
+
+class CompiledArenaError(Exception):
+    pass
+
+
+def compiled_file_path(name: str) -> str:
+    return os.path.join('resources', 'arenas', f'{name}.gupbc')
+
+
+def write(path: str, arena: CompiledArena) -> None:
+    height, width = arena.codes.shape
+    signature = arena.signature if arena.signature is not None else (0, -1)
+    menhir = arena.menhir if arena.menhir is not None else (NO_MENHIR, NO_MENHIR)
+    name = arena.name.encode('utf-8')
+    loot = np.array(
+        [(position.x, position.y, ord(weapon)) for position, weapon in arena.loot],
+        dtype=LOOT_DTYPE,
+    )
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, width, height, *signature, len(loot), *menhir, len(name),
+    )
+    temporary_path = f'{path}.tmp'
+    with open(temporary_path, 'wb') as file:
+        file.write(header)
+        file.write(name)
+        file.write(np.ascontiguousarray(arena.codes, dtype=np.int8).tobytes())
+        file.write(loot.tobytes())
+    os.replace(temporary_path, path)
+
+
+def read(path: str) -> CompiledArena:
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size < HEADER.size:
+            raise CompiledArenaError(f"{path} is too short to be a compiled arena")
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, width, height, mtime_ns, source_size, loot_count, menhir_x, menhir_y, name_length = \
+        HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise CompiledArenaError(f"{path} is not a compiled arena in format version {FORMAT_VERSION}")
+    offset = HEADER.size + name_length
+    if len(buffer) != offset + width * height + loot_count * LOOT_DTYPE.itemsize:
+        raise CompiledArenaError(f"{path} is truncated")
+    name = bytes(buffer[HEADER.size:offset]).decode('utf-8')
+    # The codes stay mapped read-only, so a compiled arena is never copied until it is instantiated.
+    codes = np.frombuffer(buffer, dtype=np.int8, count=width * height, offset=offset).reshape(height, width)
+    loot = np.frombuffer(buffer, dtype=LOOT_DTYPE, count=loot_count, offset=offset + width * height)
+    return CompiledArena(
+        name,
+        (mtime_ns, source_size) if source_size >= 0 else None,
+        codes,
+        [(coordinates.Coords(x, y), chr(weapon)) for x, y, weapon in loot.tolist()],
+        coordinates.Coords(menhir_x, menhir_y) if menhir_x != NO_MENHIR else None,
+    )
+
+
+def load(name: str, signature: Optional[tuple[int, int]]) -> Optional[CompiledArena]:
+    """
+    Returns the compiled arena if it exists and was compiled from a source with the given signature.
+    Without a source file (signature None) any compiled arena is accepted.
+    """
+    path = compiled_file_path(name)
+    if not os.path.exists(path):
+        return None
+    try:
+        arena = read(path)
+    except CompiledArenaError:
+        return None
+    if signature is not None and arena.signature != signature:
+        return None
+    return arena
@@ -1,5 +1,6 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
+import functools
 from typing import NamedTuple
 
 from gupb.model import characters
@@ -11,9 +12,16 @@ class ConsumableDescription(NamedTuple):
     name: str
 
 
+@functools.lru_cache(maxsize=None)
+def consumable_description(name: str) -> ConsumableDescription:
+    return ConsumableDescription(name)
+
+
 class Consumable(ABC):
+    __slots__ = ()
+
     def description(self) -> ConsumableDescription:
-        return ConsumableDescription(self.__class__.__name__.lower())
+        return consumable_description(self.__class__.__name__.lower())
 
     @classmethod
     @abstractmethod
@@ -22,6 +30,8 @@ class Consumable(ABC):
 
 
 class Potion(Consumable):
+    __slots__ = ()
+
     @classmethod
     def apply_to(cls, champion: characters.Champion):
         champion.health += POTION_RESTORED_HP
@@ -20,6 +20,11 @@ class EffectDescription(NamedTuple):
     type: str
 
 
+@functools.lru_cache(maxsize=None)
+def effect_description(effect_type: str) -> EffectDescription:
+    return EffectDescription(effect_type)
+
+
 class EffectLifetime(StrEnum):
     INSTANT = auto()
     ETERNAL = auto()
@@ -27,10 +32,12 @@ class EffectLifetime(StrEnum):
 
 @functools.total_ordering
 class Effect(ABC):
+    __slots__ = ()
+
     order: int = 0
 
     def description(self) -> EffectDescription:
-        return EffectDescription(self.__class__.__name__.lower())
+        return effect_description(self.__class__.__name__.lower())
 
     def __lt__(self, other):
         return self.order < other.order
@@ -52,6 +59,8 @@ class Effect(ABC):
 
 
 class Mist(Effect):
+    __slots__ = ()
+
     @staticmethod
     def instant(champion: characters.Champion) -> None:
         pass
@@ -59,8 +68,8 @@ class Mist(Effect):
     @staticmethod
     def stay(champion: characters.Champion) -> None:
         if champion:
-            verbose_logger.debug(f"Champion {champion.controller.name} was damaged by deadly mist.")
-            ChampionDamagedByMistReport(champion.controller.name, MIST_DAMAGE).log(logging.DEBUG)
+            verbose_logger.debug("Champion %s was damaged by deadly mist.", champion.controller.name)
+            ChampionDamagedByMistReport.emit(logging.DEBUG, champion.controller.name, MIST_DAMAGE)
             champion.damage(MIST_DAMAGE)
 
     @staticmethod
@@ -69,13 +78,15 @@ class Mist(Effect):
 
 
 class WeaponCut(Effect):
+    __slots__ = ('damage',)
+
     def __init__(self, damage: int = CUT_DAMAGE):
         self.damage: int = damage
 
     def instant(self, champion: characters.Champion) -> None:
         if champion:
-            verbose_logger.debug(f"Champion {champion.controller.name} was damaged by weapon cut.")
-            ChampionDamagedByWeaponCutReport(champion.controller.name, self.damage).log(logging.DEBUG)
+            verbose_logger.debug("Champion %s was damaged by weapon cut.", champion.controller.name)
+            ChampionDamagedByWeaponCutReport.emit(logging.DEBUG, champion.controller.name, self.damage)
             champion.damage(self.damage)
 
     @staticmethod
@@ -88,11 +99,13 @@ class WeaponCut(Effect):
 
 
 class Fire(Effect):
+    __slots__ = ()
+
     @staticmethod
     def burn(champion: characters.Champion) -> None:
         if champion:
-            verbose_logger.debug(f"Champion {champion.controller.name} was damaged by fire.")
-            ChampionDamagedByFireReport(champion.controller.name, FIRE_DAMAGE).log(logging.DEBUG)
+            verbose_logger.debug("Champion %s was damaged by fire.", champion.controller.name)
+            ChampionDamagedByFireReport.emit(logging.DEBUG, champion.controller.name, FIRE_DAMAGE)
             champion.damage(FIRE_DAMAGE)
 
     @staticmethod
@@ -126,10 +139,21 @@ class ChampionDamagedByFireReport(logger_core.LoggingMixin):
     damage: int
 
 
-EFFECTS_ORDER = {
+EFFECTS_ORDER = (
     Mist,
     WeaponCut,
     Fire,
-}
+)
 for i, effect in enumerate(EFFECTS_ORDER):
     effect.order = i
+
+EFFECT_TYPES: tuple[type[Effect], ...] = tuple(sorted(EFFECTS_ORDER, key=lambda effect_type: effect_type.order))
+INSTANT_EFFECTS_MASK: int = sum(
+    1 << effect_type.order for effect_type in EFFECT_TYPES if effect_type.lifetime() == EffectLifetime.INSTANT
+)
+MIST_BIT: int = 1 << Mist.order
+# Effects without any state of their own are only recorded as a bit on a tile and share one instance.
+STATELESS_EFFECTS: dict[type[Effect], Effect] = {
+    Mist: Mist(),
+    Fire: Fire(),
+}
@@ -0,0 +1,97 @@
+from __future__ import annotations
+import functools
+from typing import Optional
+
+from gupb.model import characters
+from gupb.model import coordinates
+from gupb.model import terrains
+from gupb.model import weapons
+
+FootprintKey = tuple[type['weapons.Weapon'], int, characters.Facing]
+
+
+@functools.lru_cache(maxsize=None)
+def layout_footprints(size: tuple[int, int], layout: bytes) -> dict[FootprintKey, Optional[tuple[int, ...]]]:
+    # Raw footprints only depend on which cells exist, so terrains with the same layout share them.
+    return {}
+
+
+class FootprintTable:
+    """
+    Raw attack footprints of every (weapon type, position, facing) on a terrain, kept as cell numbers
+    clipped to the cells that exist. They are built on first use and shared with every terrain of the
+    same layout, such as the arenas controllers load for themselves. Whether an obstacle cuts a
+    footprint short depends on the champions around, so that truncation is only applied at lookup.
+    A weapon type without `footprint_offsets` has no footprint and is cut procedurally.
+    """
+
+    def __init__(self, terrain: terrains.Terrain) -> None:
+        self.terrain: terrains.Terrain = terrain
+        self.layout_version: int = -1
+        self.footprints: dict[FootprintKey, Optional[tuple[int, ...]]] = {}
+
+    def __getstate__(self) -> dict:
+        # The shared footprints are looked up again rather than copied.
+        return {'terrain': self.terrain, 'layout_version': -1, 'footprints': {}}
+
+    def raw_cells(
+            self,
+            weapon_type: type[weapons.Weapon],
+            cell: int,
+            facing: characters.Facing,
+    ) -> Optional[tuple[int, ...]]:
+        if self.layout_version != self.terrain.layout_version:
+            self.footprints = layout_footprints(self.terrain.size, self.terrain.layout())
+            self.layout_version = self.terrain.layout_version
+        key = (weapon_type, cell, facing)
+        try:
+            return self.footprints[key]
+        except KeyError:
+            footprint = self.footprints[key] = self._build(weapon_type, cell, facing)
+            return footprint
+
+    def _build(
+            self,
+            weapon_type: type[weapons.Weapon],
+            cell: int,
+            facing: characters.Facing,
+    ) -> Optional[tuple[int, ...]]:
+        offsets = weapon_type.footprint_offsets(facing)
+        if offsets is None:
+            return None
+        x, y = self.terrain.cell_coords[cell]
+        stops_at_obstacles = weapon_type.stops_at_obstacles()
+        footprint = []
+        for dx, dy in offsets:
+            target = (x + dx, y + dy)
+            if not self.terrain.within(*target) or not self.terrain.has_cell(self.terrain.cell(target)):
+                if stops_at_obstacles:
+                    break
+                continue
+            footprint.append(self.terrain.cell(target))
+        return tuple(footprint)
+
+    def cells(
+            self,
+            weapon_type: type[weapons.Weapon],
+            cell: int,
+            facing: characters.Facing,
+    ) -> Optional[tuple[int, ...]]:
+        footprint = self.raw_cells(weapon_type, cell, facing)
+        if footprint is not None and weapon_type.stops_at_obstacles():
+            transparent = self.terrain.transparent_flat
+            for i, footprint_cell in enumerate(footprint):
+                if not transparent[footprint_cell]:
+                    return footprint[:i + 1]
+        return footprint
+
+    def positions(
+            self,
+            weapon_type: type[weapons.Weapon],
+            position: coordinates.Coords,
+            facing: characters.Facing,
+    ) -> Optional[list[coordinates.Coords]]:
+        cells = self.cells(weapon_type, self.terrain.cell(position), facing)
+        if cells is None:
+            return None
+        return [self.terrain.cell_coords[cell] for cell in cells]
@@ -12,6 +12,7 @@ from gupb.logger import core as logger_core
 from gupb.model import arenas
 from gupb.model import characters
 from gupb.model import coordinates
+from gupb.model import visibility
 
 verbose_logger = logging.getLogger('verbose')
 
@@ -20,6 +21,11 @@ MIST_TTH_PER_CHAMPION: int = 2
 ChampionDeath = NamedTuple('ChampionDeath', [('champion', characters.Champion), ('episode', int)])
 
 
+def game_rng(tournament_seed: int, game_no: int) -> random.Random:
+    # Seeding with a string is stable across processes and Python runs, unlike hashing a tuple.
+    return random.Random(f'{tournament_seed}/{game_no}')
+
+
 class Game(statemachine.StateMachine):
     actions_done = statemachine.State('ActionsDone', value=9, initial=True)
     instants_triggered = statemachine.State('InstantsTriggered', value=1)
@@ -33,9 +39,13 @@ class Game(statemachine.StateMachine):
             to_spawn: list[controller.Controller],
             menhir_position: Optional[coordinates.Coords] = None,
             initial_champion_positions: Optional[list[coordinates.Coords]] = None,
+            visibility_engine: str = visibility.DEFAULT_ENGINE,
+            rng: Optional[random.Random] = None,
     ) -> None:
         self.game_no: int = game_no
-        self.arena: arenas.Arena = arenas.Arena.load(arena_name)
+        # All randomness of the game is drawn from its own generator, see `game_rng`.
+        self.rng: random.Random = rng if rng is not None else random.Random(random.getrandbits(64))
+        self.arena: arenas.Arena = arenas.Arena.load(arena_name, visibility_engine, self.rng)
         self.arena.spawn_menhir(menhir_position)
         self._prepare_controllers(to_spawn)
         self.initial_champion_positions: Optional[list[coordinates.Coords]] = initial_champion_positions
@@ -56,6 +66,33 @@ class Game(statemachine.StateMachine):
     def on_enter_instants_triggered(self):
         self.arena.trigger_instants()
 
+    def play_headless(
+            self,
+            pause_before: Optional[characters.Champion] = None,
+            action: Optional[characters.Action] = None,
+    ) -> int:
+        """
+        Plays the game to its end exactly like repeated `cycle` calls, but calls the actions directly instead of
+        dispatching them through the state machine. Returns the number of cycles played.
+        Given a champion, it stops right before that champion would act, while it is alive. Playing on from
+        there lets the champion act first, with the given action instead of the one of its controller.
+        """
+        instants_next = self.current_state_value == self.actions_done.value
+        cycles = 0
+        while not self.finished:
+            if instants_next:
+                self.arena.trigger_instants()
+            elif self.action_queue:
+                if cycles and self.action_queue[-1] is pause_before and pause_before.alive:
+                    break
+                self._champion_action(None if cycles else action)
+            else:
+                self._environment_action()
+            instants_next = not instants_next
+            cycles += 1
+        self.current_state_value = self.actions_done.value if instants_next else self.instants_triggered.value
+        return cycles
+
     def score(self) -> dict[controller.Controller, int]:
         if not self.finished:
             raise RuntimeError("Attempted to score an unfinished game!")
@@ -71,16 +108,18 @@ class Game(statemachine.StateMachine):
     ) -> list[characters.Champion]:
         champions = []
         if self.initial_champion_positions is None:
-            self.initial_champion_positions = random.sample(self.arena.empty_coords(), len(to_spawn))
+            self.initial_champion_positions = self.rng.sample(self.arena.terrain.free, len(to_spawn))
         if len(to_spawn) != len(self.initial_champion_positions):
             raise RuntimeError("Unable to spawn champions: not enough positions!")  # TODO: remove if works
         for controller_to_spawn, coords in zip(to_spawn, self.initial_champion_positions):
             champion = self.arena.spawn_champion_at(coords)
             champion.assign_controller(controller_to_spawn)
             champions.append(champion)
-            verbose_logger.debug(f"{champion.tabard.value} champion for {controller_to_spawn.name}"
-                                 f" spawned at {coords} facing {champion.facing}.")
-            ChampionSpawnedReport(controller_to_spawn.name, coords, champion.facing.value).log(logging.DEBUG)
+            verbose_logger.debug(
+                "%s champion for %s spawned at %s facing %s.",
+                champion.tabard.value, controller_to_spawn.name, coords, champion.facing,
+            )
+            ChampionSpawnedReport.emit(logging.DEBUG, controller_to_spawn.name, coords, champion.facing.value)
         return champions
 
     def _environment_action(self) -> None:
@@ -88,8 +127,8 @@ class Game(statemachine.StateMachine):
         self.action_queue = self.champions.copy()
         self.episode += 1
         self.episodes_since_mist_increase += 1
-        verbose_logger.debug(f"Starting episode {self.episode}.")
-        EpisodeStartReport(self.episode).log(logging.DEBUG)
+        verbose_logger.debug("Starting episode %s.", self.episode)
+        EpisodeStartReport.emit(logging.DEBUG, self.episode)
         if self.episodes_since_mist_increase >= MIST_TTH_PER_CHAMPION * len(self.champions):
             self.arena.increase_mist()
             self.episodes_since_mist_increase = 0
@@ -105,8 +144,8 @@ class Game(statemachine.StateMachine):
                 self.arena.no_of_champions_alive -= 1
         self.champions = alive
         if len(self.champions) == 1:
-            verbose_logger.debug(f"Champion {self.champions[0].controller.name} was the last one standing.")
-            LastManStandingReport(self.champions[0].controller.name).log(logging.DEBUG)
+            verbose_logger.debug("Champion %s was the last one standing.", self.champions[0].controller.name)
+            LastManStandingReport.emit(logging.DEBUG, self.champions[0].controller.name)
             champion = self.champions.pop()
             death = ChampionDeath(champion, self.episode)
             self.deaths.append(death)
@@ -118,9 +157,9 @@ class Game(statemachine.StateMachine):
         if not self.champions:
             self.finished = True
 
-    def _champion_action(self) -> None:
+    def _champion_action(self, action: Optional[characters.Action] = None) -> None:
         champion = self.action_queue.pop()
-        champion.act()
+        champion.act(action)
 
     @staticmethod
     def _fibonacci() -> Iterator[int]:
@@ -0,0 +1,346 @@
+from __future__ import annotations
+from collections.abc import Iterator, Mapping, MutableMapping, Sequence
+import functools
+from typing import Optional
+
+import numpy as np
+import sortedcontainers
+
+from gupb.model import consumables
+from gupb.model import coordinates
+from gupb.model import footprints
+from gupb.model import tiles
+from gupb.model import weapons
+
+VOID: int = -1
+NO_CELL: int = -1
+
+NEIGHBOUR_OFFSETS: tuple[coordinates.Coords, ...] = tuple(
+    coordinates.Coords(dx, dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dx or dy
+)
+
+TILE_TYPES: list[type[tiles.Tile]] = [
+    tiles.Land,
+    tiles.Sea,
+    tiles.Wall,
+    tiles.Forest,
+    tiles.Menhir,
+]
+TILE_CODES: dict[type[tiles.Tile], int] = {tile_type: code for code, tile_type in enumerate(TILE_TYPES)}
+
+
+def tile_code(tile_type: type[tiles.Tile]) -> int:
+    if tile_type not in TILE_CODES:
+        TILE_CODES[tile_type] = len(TILE_TYPES)
+        TILE_TYPES.append(tile_type)
+    return TILE_CODES[tile_type]
+
+
+# Loot and consumables are coded by their description names, 0 meaning there is nothing.
+LOOT_CODES: dict[str, int] = {name: code for code, name in enumerate(
+    ['knife', 'sword', 'axe', 'bow_unloaded', 'bow_loaded', 'amulet', 'scroll'], start=1,
+)}
+CONSUMABLE_CODES: dict[str, int] = {'potion': 1}
+
+
+def item_code(codes: dict[str, int], item: Optional[weapons.Weapon | consumables.Consumable]) -> int:
+    if item is None:
+        return 0
+    name = item.description().name
+    if name not in codes:
+        codes[name] = len(codes) + 1
+    return codes[name]
+
+
+def flat_view(array: np.ndarray) -> memoryview:
+    return memoryview(array.reshape(-1).view(np.uint8))
+
+
+@functools.lru_cache(maxsize=None)
+def coords_table(size: tuple[int, int]) -> tuple[coordinates.Coords, ...]:
+    width, height = size
+    return tuple(coordinates.Coords(i % width, i // width) for i in range(width * height))
+
+
+@functools.lru_cache(maxsize=None)
+def neighbour_table(size: tuple[int, int]) -> dict[coordinates.Coords, tuple[int, ...]]:
+    # For every offset of a neighbouring cell, including facings, the cell reached from each cell or NO_CELL.
+    width, height = size
+    ys, xs = np.indices((height, width))
+    table = {}
+    for offset in NEIGHBOUR_OFFSETS:
+        nxs, nys = xs + offset.x, ys + offset.y
+        inside = (nxs >= 0) & (nxs < width) & (nys >= 0) & (nys < height)
+        table[offset] = tuple(np.where(inside, nys * width + nxs, NO_CELL).reshape(-1).tolist())
+    return table
+
+
+class MistField:
+    """
+    Mist covers every cell whose distance to the menhir lies within [radius, outer), apart from
+    the menhir itself, so tiles do not need to hold mist effects of their own.
+    """
+
+    def __init__(self, distance: np.ndarray, outer: int) -> None:
+        self.width: int = distance.shape[1]
+        self.distance: list[int] = distance.reshape(-1).tolist()
+        self.outer: int = outer
+        self.radius: int = outer
+
+    def covers(self, coords: coordinates.Coords) -> bool:
+        return max(self.radius, 1) <= self.distance[coords[1] * self.width + coords[0]] < self.outer
+
+
+class TerrainObserver:
+    def tile_replaced(self, coords: coordinates.Coords) -> None:
+        pass
+
+    def transparency_changed(self, coords: coordinates.Coords) -> None:
+        pass
+
+
+class FreeCells(Sequence[coordinates.Coords]):
+    """
+    Sorted index of the empty cells of a terrain, i.e. passable cells without a champion or loot.
+    It is kept up to date by the terrain, so sampling and iteration never scan the arena.
+    The sorted list is only built from the mask of empty cells once it is first needed.
+    """
+
+    def __init__(self, size: tuple[int, int], mask: Optional[np.ndarray] = None) -> None:
+        self.size: tuple[int, int] = size
+        self.width: int = size[0]
+        self.mask: bytearray = bytearray(size[0] * size[1]) if mask is None else bytearray(mask.astype(np.uint8))
+        self._cells: Optional[sortedcontainers.SortedList[coordinates.Coords]] = None
+
+    @property
+    def cells(self) -> sortedcontainers.SortedList[coordinates.Coords]:
+        if self._cells is None:
+            width, height = self.size
+            # Coords are ordered by x first, so the mask is read column by column.
+            by_columns = np.flatnonzero(np.frombuffer(self.mask, dtype=np.uint8).reshape(height, width).T)
+            cell_coords = coords_table(self.size)
+            self._cells = sortedcontainers.SortedList(
+                cell_coords[i % height * width + i // height] for i in by_columns.tolist()
+            )
+        return self._cells
+
+    def update(self, coords: coordinates.Coords, free: bool) -> None:
+        cell = coords[1] * self.width + coords[0]
+        if free and not self.mask[cell]:
+            self.mask[cell] = 1
+            if self._cells is not None:
+                self._cells.add(coordinates.Coords(*coords))
+        elif not free and self.mask[cell]:
+            self.mask[cell] = 0
+            if self._cells is not None:
+                self._cells.remove(coordinates.Coords(*coords))
+
+    def __getitem__(self, index):
+        return self.cells[index]
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def __iter__(self) -> Iterator[coordinates.Coords]:
+        return iter(self.cells)
+
+    def __contains__(self, coords: object) -> bool:
+        try:
+            x, y = coords
+            return 0 <= x < self.width and bool(self.mask[y * self.width + x])
+        except (TypeError, ValueError, IndexError):
+            return False
+
+
+class Terrain(MutableMapping[coordinates.Coords, tiles.Tile]):
+    """
+    Dense grid of arena tiles. Terrain type, passability, transparency and occupancy are kept
+    as NumPy arrays indexed [y, x], while the mapping interface still hands out `Tile` objects.
+    The `*_flat` memoryviews share memory with the arrays and are indexed with `y * width + x`,
+    which is much cheaper than NumPy scalar indexing on per-cell hot paths.
+
+    The engine moves around in such cell numbers with the `neighbours` tables and only turns them
+    back into the shared `Coords` of `cell_coords` where controllers can see them.
+
+    Whether a cell exists is told by `codes`. A terrain cloned `from_codes` only creates the `Tile`
+    of a cell when it is first accessed, until then its entry in `tiles` is None.
+    """
+
+    def __init__(self, size: tuple[int, int]) -> None:
+        self.size: tuple[int, int] = size
+        width, height = size
+        self.tiles: list[Optional[tiles.Tile]] = [None] * (width * height)
+        self.codes: np.ndarray = np.full((height, width), VOID, dtype=np.int8)
+        self.terrain_passable: np.ndarray = np.zeros((height, width), dtype=bool)
+        self.terrain_transparent: np.ndarray = np.zeros((height, width), dtype=bool)
+        self.occupied: np.ndarray = np.zeros((height, width), dtype=bool)
+        self.passable: np.ndarray = np.zeros((height, width), dtype=bool)
+        self.transparent: np.ndarray = np.zeros((height, width), dtype=bool)
+        self.loot_codes: np.ndarray = np.zeros((height, width), dtype=np.uint8)
+        self.consumable_codes: np.ndarray = np.zeros((height, width), dtype=np.uint8)
+        self.effect_masks: np.ndarray = np.zeros((height, width), dtype=np.uint8)
+        self._share_flat_views()
+        self.cell_coords: tuple[coordinates.Coords, ...] = coords_table(size)
+        self.neighbours: dict[coordinates.Coords, tuple[int, ...]] = neighbour_table(size)
+        self.free: FreeCells = FreeCells(size)
+        self.layout_version: int = 0
+        self.footprints: footprints.FootprintTable = footprints.FootprintTable(self)
+        self.mist: Optional[MistField] = None
+        self.observers: list[TerrainObserver] = []
+        self._keys: Optional[list[coordinates.Coords]] = None
+
+    def _share_flat_views(self) -> None:
+        self.codes_flat: memoryview = memoryview(self.codes.reshape(-1))
+        self.passable_flat: memoryview = flat_view(self.passable)
+        self.transparent_flat: memoryview = flat_view(self.transparent)
+        self.loot_codes_flat: memoryview = flat_view(self.loot_codes)
+        self.consumable_codes_flat: memoryview = flat_view(self.consumable_codes)
+        self.effect_masks_flat: memoryview = flat_view(self.effect_masks)
+
+    def __getstate__(self) -> dict:
+        # Memoryviews cannot be pickled or copied, they are shared with the copied arrays anew.
+        return {name: value for name, value in self.__dict__.items() if not isinstance(value, memoryview)}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._share_flat_views()
+
+    @staticmethod
+    def from_mapping(terrain: Mapping[coordinates.Coords, tiles.Tile]) -> Terrain:
+        estimated_x_size, estimated_y_size = max(terrain)
+        grid = Terrain((estimated_x_size + 1, estimated_y_size + 1))
+        for coords, tile in terrain.items():
+            grid[coords] = tile
+        return grid
+
+    @staticmethod
+    def from_codes(codes: np.ndarray) -> Terrain:
+        height, width = codes.shape
+        grid = Terrain((width, height))
+        present = codes != VOID
+        grid.codes[:] = codes
+        grid.terrain_passable[:] = np.array([tile_type.terrain_passable() for tile_type in TILE_TYPES])[codes] & present
+        grid.terrain_transparent[:] = np.array([tile_type.terrain_transparent() for tile_type in TILE_TYPES])[codes] & present
+        grid.passable[:] = grid.terrain_passable
+        grid.transparent[:] = grid.terrain_transparent
+        grid.free = FreeCells(grid.size, grid.passable)
+        return grid
+
+    def cell(self, coords: coordinates.Coords) -> int:
+        return coords[1] * self.size[0] + coords[0]
+
+    def has_cell(self, cell: int) -> bool:
+        return cell != NO_CELL and self.codes_flat[cell] != VOID
+
+    def layout(self) -> bytes:
+        """ Which cells exist, as one byte per cell. """
+        return (self.codes != VOID).tobytes()
+
+    def tile(self, cell: int) -> tiles.Tile:
+        """ The tile of an existing cell, created on first access. """
+        tile = self.tiles[cell]
+        if tile is None:
+            tile = TILE_TYPES[self.codes_flat[cell]]()
+            tile.grid, tile.coords = self, self.cell_coords[cell]
+            self.tiles[cell] = tile
+        return tile
+
+    def existing_cells(self, cells: np.ndarray) -> np.ndarray:
+        return cells[self.codes.reshape(-1)[cells] != VOID]
+
+    def within(self, x: int, y: int) -> bool:
+        return 0 <= x < self.size[0] and 0 <= y < self.size[1]
+
+    def __getitem__(self, coords: coordinates.Coords) -> tiles.Tile:
+        x, y = coords
+        if 0 <= x < self.size[0] and 0 <= y < self.size[1]:
+            tile = self.tiles[y * self.size[0] + x]
+            if tile is not None:
+                return tile
+            if self.codes_flat[y * self.size[0] + x] != VOID:
+                return self.tile(y * self.size[0] + x)
+        raise KeyError(coords)
+
+    def __contains__(self, coords: object) -> bool:
+        try:
+            x, y = coords
+            return 0 <= x < self.size[0] and 0 <= y < self.size[1] and self.codes_flat[y * self.size[0] + x] != VOID
+        except (TypeError, ValueError):
+            return False
+
+    def __setitem__(self, coords: coordinates.Coords, tile: tiles.Tile) -> None:
+        x, y = coords
+        if not self.within(x, y):
+            raise KeyError(coords)
+        previous = self.tiles[y * self.size[0] + x]
+        if previous is not None:
+            previous.grid = None
+        elif self.codes_flat[y * self.size[0] + x] == VOID:
+            self._keys = None
+            self.layout_version += 1
+        self.tiles[y * self.size[0] + x] = tile
+        tile.grid, tile.coords = self, self.cell_coords[y * self.size[0] + x]
+        self.codes[y, x] = tile_code(type(tile))
+        self.terrain_passable[y, x] = tile.terrain_passable()
+        self.terrain_transparent[y, x] = tile.terrain_transparent()
+        self.update_occupancy(tile.coords, tile.character is not None)
+        self.update_loot(tile.coords, tile.loot)
+        self.update_consumable(tile.coords, tile.consumable)
+        self.update_effects(tile.coords, tile.effect_mask)
+        for observer in self.observers:
+            observer.tile_replaced(tile.coords)
+
+    def __delitem__(self, coords: coordinates.Coords) -> None:
+        if coords not in self:
+            raise KeyError(coords)
+        x, y = coords
+        tile = self.tiles[y * self.size[0] + x]
+        if tile is not None:
+            tile.grid = None
+        self.tiles[y * self.size[0] + x] = None
+        self.codes[y, x] = VOID
+        self.terrain_passable[y, x] = False
+        self.terrain_transparent[y, x] = False
+        self.occupied[y, x] = False
+        self.passable[y, x] = False
+        self.transparent[y, x] = False
+        self.loot_codes[y, x] = 0
+        self.consumable_codes[y, x] = 0
+        self.effect_masks[y, x] = 0
+        self.free.update(coords, False)
+        self._keys = None
+        self.layout_version += 1
+        for observer in self.observers:
+            observer.tile_replaced(coordinates.Coords(x, y))
+
+    def __iter__(self) -> Iterator[coordinates.Coords]:
+        if self._keys is None:
+            self._keys = list(map(self.cell_coords.__getitem__, np.flatnonzero(self.codes != VOID).tolist()))
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        if self._keys is None:
+            return int(np.count_nonzero(self.codes != VOID))
+        return len(self._keys)
+
+    def update_occupancy(self, coords: coordinates.Coords, occupied: bool) -> None:
+        x, y = coords
+        transparent = self.terrain_transparent[y, x] and not occupied
+        self.occupied[y, x] = occupied
+        self.passable[y, x] = self.terrain_passable[y, x] and not occupied
+        self.free.update(coords, self.tiles[y * self.size[0] + x].empty)
+        if self.transparent[y, x] != transparent:
+            self.transparent[y, x] = transparent
+            for observer in self.observers:
+                observer.transparency_changed(coords)
+
+    def update_loot(self, coords: coordinates.Coords, weapon: Optional[weapons.Weapon]) -> None:
+        cell = coords[1] * self.size[0] + coords[0]
+        self.loot_codes_flat[cell] = item_code(LOOT_CODES, weapon)
+        self.free.update(coords, self.tiles[cell].empty)
+
+    def update_consumable(self, coords: coordinates.Coords, consumable: Optional[consumables.Consumable]) -> None:
+        self.consumable_codes_flat[coords[1] * self.size[0] + coords[0]] = item_code(CONSUMABLE_CODES, consumable)
+
+    def update_effects(self, coords: coordinates.Coords, effect_mask: int) -> None:
+        self.effect_masks_flat[coords[1] * self.size[0] + coords[0]] = effect_mask
@@ -1,15 +1,17 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
+import bisect
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
 import logging
 from typing import NamedTuple, Optional, List
 
-import sortedcontainers
-
 from gupb.logger import core as logger_core
+from gupb.model import arenas
 from gupb.model import effects
 from gupb.model import characters
 from gupb.model import consumables
+from gupb.model import coordinates
 from gupb.model import weapons
 
 verbose_logger = logging.getLogger('verbose')
@@ -24,24 +26,137 @@ class TileDescription(NamedTuple):
 
 
 class Tile(ABC):
+    __slots__ = (
+        'grid', 'coords', 'version', '_loot', '_consumable', '_character', '_effect_mask',
+        '_effect_extras', '_description', '_description_version', '_description_mask',
+    )
+
     def __init__(self):
-        self.loot: Optional[weapons.Weapon] = None
-        self.consumable: Optional[consumables.Consumable] = None
-        self.character: Optional[characters.Champion] = None
-        self.effects: sortedcontainers.SortedList[effects.Effect] = sortedcontainers.SortedList()
+        self.grid: Optional[arenas.Terrain] = None
+        self.coords: Optional[coordinates.Coords] = None
+        self.version: int = 0
+        self._loot: Optional[weapons.Weapon] = None
+        self._consumable: Optional[consumables.Consumable] = None
+        self._character: Optional[characters.Champion] = None
+        self._effect_mask: int = 0
+        self._effect_extras: Optional[list[effects.Effect]] = None
+        self._description: Optional[TileDescription] = None
+        self._description_version: int = -1
+        self._description_mask: int = 0
+
+    @property
+    def loot(self) -> Optional[weapons.Weapon]:
+        return self._loot
+
+    @loot.setter
+    def loot(self, weapon: Optional[weapons.Weapon]) -> None:
+        self._loot = weapon
+        self.version += 1
+        if self.grid is not None:
+            self.grid.update_loot(self.coords, weapon)
+
+    @property
+    def consumable(self) -> Optional[consumables.Consumable]:
+        return self._consumable
+
+    @consumable.setter
+    def consumable(self, consumable: Optional[consumables.Consumable]) -> None:
+        self._consumable = consumable
+        self.version += 1
+        if self.grid is not None:
+            self.grid.update_consumable(self.coords, consumable)
+
+    @property
+    def character(self) -> Optional[characters.Champion]:
+        return self._character
+
+    @character.setter
+    def character(self, champion: Optional[characters.Champion]) -> None:
+        self._character = champion
+        self.version += 1
+        if self.grid is not None:
+            self.grid.update_occupancy(self.coords, champion is not None)
+
+    @property
+    def effects(self) -> list[effects.Effect]:
+        effect_mask = self._current_effect_mask()
+        return list(self._iter_effects(effect_mask)) if effect_mask else []
+
+    @effects.setter
+    def effects(self, tile_effects: Iterable[effects.Effect]) -> None:
+        self._effect_mask = 0
+        self._effect_extras = None
+        for effect in tile_effects:
+            self._add_effect(effect)
+        self.version += 1
+        if self.grid is not None:
+            self.grid.update_effects(self.coords, self._effect_mask)
+
+    @property
+    def effect_mask(self) -> int:
+        """ Bits of the effects stored on the tile, without the mist coming from the terrain. """
+        return self._effect_mask
+
+    def add_effect(self, effect: effects.Effect) -> None:
+        self._add_effect(effect)
+        self.version += 1
+        if self.grid is not None:
+            self.grid.update_effects(self.coords, self._effect_mask)
+
+    def _add_effect(self, effect: effects.Effect) -> None:
+        # A bit of `_effect_mask` is set for every effect type present, in `EFFECTS_ORDER`.
+        # Mist is normally not stored at all, it comes from the mist field of the terrain.
+        # Weapon cuts carry their damage and stateless effects may stack, so those instances
+        # go to `_effect_extras`, which is kept sorted the way the former `SortedList` was.
+        bit = 1 << effect.order
+        if not self._effect_mask & bit and type(effect) in effects.STATELESS_EFFECTS:
+            self._effect_mask |= bit
+            return
+        self._effect_mask |= bit
+        if self._effect_extras is None:
+            self._effect_extras = []
+        bisect.insort(self._effect_extras, effect)
+
+    def _current_effect_mask(self) -> int:
+        grid = self.grid
+        if grid is not None and grid.mist is not None and grid.mist.covers(self.coords):
+            return self._effect_mask | effects.MIST_BIT
+        return self._effect_mask
+
+    def _iter_effects(self, effect_mask: int) -> Iterator[effects.Effect]:
+        for effect_type in effects.EFFECT_TYPES:
+            if effect_mask & (1 << effect_type.order):
+                if effect_type in effects.STATELESS_EFFECTS:
+                    yield effects.STATELESS_EFFECTS[effect_type]
+                if self._effect_extras:
+                    for effect in self._effect_extras:
+                        if type(effect) is effect_type:
+                            yield effect
 
     def description(self) -> TileDescription:
-        return TileDescription(
-            self.__class__.__name__.lower(),
-            self.loot.description() if self.loot else None,
-            self.character.description() if self.character else None,
-            self.consumable.description() if self.consumable else None,
-            [effect.description() for effect in self.effects],
-        )
+        # The memoised description is shared by every observer, so it must not be mutated.
+        # A champion standing here can change without touching the tile, hence the extra comparison.
+        character = self._character.description() if self._character else None
+        effect_mask = self._current_effect_mask()
+        if (
+                self._description_version != self.version
+                or self._description_mask != effect_mask
+                or self._description.character != character
+        ):
+            self._description = TileDescription(
+                self.__class__.__name__.lower(),
+                self._loot.description() if self._loot else None,
+                character,
+                self._consumable.description() if self._consumable else None,
+                [effect.description() for effect in self._iter_effects(effect_mask)] if effect_mask else [],
+            )
+            self._description_version = self.version
+            self._description_mask = effect_mask
+        return self._description
 
     @property
     def passable(self) -> bool:
-        return self.terrain_passable() and not self.character
+        return self.terrain_passable() and not self._character
 
     @staticmethod
     @abstractmethod
@@ -50,7 +165,7 @@ class Tile(ABC):
 
     @property
     def transparent(self) -> bool:
-        return self.terrain_transparent() and not self.character
+        return self.terrain_transparent() and not self._character
 
     @staticmethod
     @abstractmethod
@@ -59,20 +174,22 @@ class Tile(ABC):
 
     @property
     def empty(self) -> bool:
-        return self.passable and not self.loot and not self.character
+        return self.passable and not self._loot and not self._character
 
     def enter(self, champion: characters.Champion) -> None:
         self.character = champion
         if self.loot:
             champion.weapon, self.loot = self.loot, champion.weapon if champion.weapon.droppable() else None
             verbose_logger.debug(
-                f"Champion {champion.controller.name} picked up a {champion.weapon.description().name}.")
-            ChampionPickedWeaponReport(champion.controller.name, champion.weapon.description().name).log(logging.DEBUG)
+                "Champion %s picked up a %s.", champion.controller.name, champion.weapon.description().name)
+            ChampionPickedWeaponReport.emit(
+                logging.DEBUG, champion.controller.name, champion.weapon.description().name)
         if self.consumable:
             self.consumable.apply_to(champion)
             verbose_logger.debug(
-                f"Champion {champion.controller.name} consumed a {self.consumable.description().name}.")
-            ChampionConsumableReport(champion.controller.name, self.consumable.description().name).log(logging.DEBUG)
+                "Champion %s consumed a %s.", champion.controller.name, self.consumable.description().name)
+            ChampionConsumableReport.emit(
+                logging.DEBUG, champion.controller.name, self.consumable.description().name)
             self.consumable = None
 
     # noinspection PyUnusedLocal
@@ -84,18 +201,24 @@ class Tile(ABC):
 
     def instant(self) -> None:
         self._activate_effects('instant')
-        self.effects = sortedcontainers.SortedList(
-            effect for effect in self.effects if effect.lifetime() != effects.EffectLifetime.INSTANT
-        )
+        if self._effect_mask & effects.INSTANT_EFFECTS_MASK:
+            self._effect_mask &= ~effects.INSTANT_EFFECTS_MASK
+            self._effect_extras = [
+                effect for effect in self._effect_extras if effect.lifetime() != effects.EffectLifetime.INSTANT
+            ] or None
+            self.version += 1
+            if self.grid is not None:
+                self.grid.update_effects(self.coords, self._effect_mask)
 
     def _activate_effects(self, activation: str) -> None:
-        if self.character:
-            if self.effects:
-                for effect in self.effects:
-                    getattr(effect, activation)(self.character)
+        if self._character:
+            for effect in self._iter_effects(self._current_effect_mask()):
+                getattr(effect, activation)(self._character)
 
 
 class Land(Tile):
+    __slots__ = ()
+
     @staticmethod
     def terrain_passable() -> bool:
         return True
@@ -106,6 +229,8 @@ class Land(Tile):
 
 
 class Sea(Tile):
+    __slots__ = ()
+
     @staticmethod
     def terrain_passable() -> bool:
         return False
@@ -116,6 +241,8 @@ class Sea(Tile):
 
 
 class Wall(Tile):
+    __slots__ = ()
+
     @staticmethod
     def terrain_passable() -> bool:
         return False
@@ -126,6 +253,8 @@ class Wall(Tile):
 
 
 class Forest(Tile):
+    __slots__ = ()
+
     @staticmethod
     def terrain_passable() -> bool:
         return True
@@ -136,6 +265,8 @@ class Forest(Tile):
 
 
 class Menhir(Tile):
+    __slots__ = ()
+
     @staticmethod
     def terrain_passable() -> bool:
         return True
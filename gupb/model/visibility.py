@@ -0,0 +1,259 @@
+from __future__ import annotations
+import functools
+from typing import Callable, Iterator, NamedTuple, Optional
+
+import bresenham
+import numpy as np
+
+from gupb.model import characters
+from gupb.model import coordinates
+from gupb.model import terrains
+
+OUTSIDE: int = 1 << 20
+CONE_CACHE_SIZE: int = 256
+
+
+class RayFan(NamedTuple):
+    dx: np.ndarray
+    dy: np.ndarray
+
+
+@functools.lru_cache(maxsize=None)
+def ray_fan(facing: characters.Facing, distance: int) -> RayFan:
+    # Rays are translation invariant, so a fan depends only on the facing and on the distance to the border.
+    # The forward reach mirrors the border estimate of the legacy ray caster, which is one tile shorter
+    # when facing down or right.
+    reach = distance if facing in (characters.Facing.UP, characters.Facing.LEFT) else distance - 1
+    forward, left = facing.value, facing.turn_left().value
+    rays = []
+    for i in range(-distance, distance + 1):
+        ray = bresenham.bresenham(0, 0, reach * forward.x + i * left.x, reach * forward.y + i * left.y)
+        next(ray)
+        rays.append(list(ray))
+    length = max(1, max(len(ray) for ray in rays))
+    dx = np.full((len(rays), length), OUTSIDE, dtype=np.int32)
+    dy = np.zeros((len(rays), length), dtype=np.int32)
+    for i, ray in enumerate(rays):
+        if ray:
+            dx[i, :len(ray)], dy[i, :len(ray)] = zip(*ray)
+    return RayFan(dx, dy)
+
+
+class Cast(NamedTuple):
+    visible: np.ndarray
+    inspected: np.ndarray
+
+
+Caster = Callable[[terrains.Terrain, coordinates.Coords, characters.Facing], Cast]
+
+
+def border_distance(size: tuple[int, int], position: coordinates.Coords, facing: characters.Facing) -> int:
+    width, height = size
+    if facing == characters.Facing.UP:
+        return position[1]
+    elif facing == characters.Facing.RIGHT:
+        return width - position[0]
+    elif facing == characters.Facing.DOWN:
+        return height - position[1]
+    elif facing == characters.Facing.LEFT:
+        return position[0]
+
+
+def cast_rays(terrain: terrains.Terrain, position: coordinates.Coords, facing: characters.Facing) -> Cast:
+    width, height = terrain.size
+    fan = ray_fan(facing, border_distance(terrain.size, position, facing))
+    x = fan.dx + position[0]
+    y = fan.dy + position[1]
+    inside = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+    cells = np.where(inside, y * width + x, 0)
+    reached = inside & (terrain.codes.reshape(-1)[cells] != terrains.VOID)
+    clear = reached & terrain.transparent.reshape(-1)[cells]
+    reached[:, 1:] &= np.logical_and.accumulate(clear[:, :-1], axis=1)
+    visible = np.unique(cells[reached])
+    return Cast(visible, visible)
+
+
+def cast_legacy_rays(terrain: terrains.Terrain, position: coordinates.Coords, facing: characters.Facing) -> Cast:
+    # The original per-call Bresenham caster, kept as the reference model for the other engines.
+    width, height = terrain.size
+    distance = border_distance(terrain.size, position, facing)
+    if facing == characters.Facing.UP:
+        border = coordinates.Coords(position[0], 0)
+    elif facing == characters.Facing.RIGHT:
+        border = coordinates.Coords(width - 1, position[1])
+    elif facing == characters.Facing.DOWN:
+        border = coordinates.Coords(position[0], height - 1)
+    else:
+        border = coordinates.Coords(0, position[1])
+    left = facing.turn_left().value
+    visible = set()
+    for i in range(-distance, distance + 1):
+        ray = bresenham.bresenham(position[0], position[1], border[0] + i * left.x, border[1] + i * left.y)
+        next(ray)
+        for ray_coords in ray:
+            if ray_coords not in terrain:
+                break
+            visible.add(ray_coords[1] * width + ray_coords[0])
+            if not terrain.transparent_flat[ray_coords[1] * width + ray_coords[0]]:
+                break
+    cells = np.array(sorted(visible), dtype=np.intp)
+    return Cast(cells, cells)
+
+
+def cast_shadows(terrain: terrains.Terrain, position: coordinates.Coords, facing: characters.Facing) -> Cast:
+    """
+    Symmetric shadowcasting over the quadrant in front of the champion, following Albert Ford's
+    formulation with exact integer slopes. A slope is kept as a (numerator, denominator) pair and
+    every row covers a column range disjoint from the other rows at its depth, so each cell is
+    inspected at most once. Walls are revealed when reached, other cells only when symmetric.
+    """
+    width, height = terrain.size
+    x0, y0 = position
+    forward, left = facing.value, facing.turn_left().value
+    depth_limit = border_distance(terrain.size, position, facing)
+    if facing in (characters.Facing.DOWN, characters.Facing.RIGHT):
+        depth_limit -= 1
+    transparent = terrain.transparent_flat
+    codes = terrain.codes_flat
+    visible, inspected = [], []
+    rows = [(1, -1, 1, 1, 1)]
+    while rows:
+        depth, start_num, start_den, end_num, end_den = rows.pop()
+        if depth > depth_limit:
+            continue
+        min_col = (2 * depth * start_num + start_den) // (2 * start_den)
+        max_col = -((end_den - 2 * depth * end_num) // (2 * end_den))
+        row_x, row_y = x0 + depth * forward.x, y0 + depth * forward.y
+        previous_wall = None
+        for col in range(min_col, max_col + 1):
+            x, y = row_x + col * left.x, row_y + col * left.y
+            if 0 <= x < width and 0 <= y < height:
+                cell = y * width + x
+                inspected.append(cell)
+                wall = not transparent[cell]
+                symmetric = col * start_den >= depth * start_num and col * end_den <= depth * end_num
+                if (wall or symmetric) and codes[cell] != terrains.VOID:
+                    visible.append(cell)
+            else:
+                wall = True
+            if previous_wall and not wall:
+                start_num, start_den = 2 * col - 1, 2 * depth
+            elif previous_wall is False and wall:
+                rows.append((depth + 1, start_num, start_den, 2 * col - 1, 2 * depth))
+            previous_wall = wall
+        if previous_wall is False:
+            rows.append((depth + 1, start_num, start_den, end_num, end_den))
+    return Cast(np.array(visible, dtype=np.intp), np.array(inspected, dtype=np.intp))
+
+
+ENGINES: dict[str, Caster] = {
+    'rays': cast_rays,
+    'shadowcasting': cast_shadows,
+    'legacy': cast_legacy_rays,
+}
+DEFAULT_ENGINE: str = 'rays'
+REFERENCE_ENGINE: str = 'legacy'
+
+
+class VisibilityDifference(NamedTuple):
+    position: coordinates.Coords
+    facing: characters.Facing
+    missing: frozenset[coordinates.Coords]
+    extra: frozenset[coordinates.Coords]
+
+
+def validate(
+        terrain: terrains.Terrain,
+        engine: str,
+        reference: str = REFERENCE_ENGINE,
+) -> Iterator[VisibilityDifference]:
+    coords = terrains.coords_table(terrain.size)
+    for position in map(coords.__getitem__, np.flatnonzero(terrain.passable).tolist()):
+        for facing in characters.Facing:
+            expected = set(ENGINES[reference](terrain, position, facing).visible.tolist())
+            actual = set(ENGINES[engine](terrain, position, facing).visible.tolist())
+            if expected != actual:
+                yield VisibilityDifference(
+                    position,
+                    facing,
+                    frozenset(map(coords.__getitem__, expected - actual)),
+                    frozenset(map(coords.__getitem__, actual - expected)),
+                )
+
+
+ConeKey = tuple[coordinates.Coords, characters.Facing]
+
+
+class CachedCone(NamedTuple):
+    slot: int
+    coords: frozenset[coordinates.Coords]
+    cells: np.ndarray
+    inspected: np.ndarray
+
+
+class VisibilityIndex(terrains.TerrainObserver):
+    """
+    Casts the vision cone of a champion with one of the `ENGINES` and caches it per (position, facing).
+    Walls, forests and seas never change, so a cone only depends on the transparency of the cells
+    its engine inspected. The `dependants` bit matrix maps every cell to the cache slots of the cones
+    that inspected it, and those cones are dropped as soon as a champion enters or leaves that cell.
+    It is only allocated once a cone is cast, so arenas loaded by controllers do not pay for it.
+    """
+
+    def __init__(self, terrain: terrains.Terrain, engine: str = DEFAULT_ENGINE) -> None:
+        self.terrain: terrains.Terrain = terrain
+        self.caster: Caster = ENGINES[engine]
+        self.coords: tuple[coordinates.Coords, ...] = terrains.coords_table(terrain.size)
+        self.cones: dict[ConeKey, CachedCone] = {}
+        self.slot_keys: list[Optional[ConeKey]] = [None] * CONE_CACHE_SIZE
+        self.free_slots: list[int] = list(range(CONE_CACHE_SIZE))
+        self.dependants: Optional[np.ndarray] = None
+        terrain.observers.append(self)
+
+    def tile_replaced(self, coords: coordinates.Coords) -> None:
+        if self.cones:
+            self.cones.clear()
+            self.slot_keys = [None] * CONE_CACHE_SIZE
+            self.free_slots = list(range(CONE_CACHE_SIZE))
+            self.dependants[:] = 0
+
+    def transparency_changed(self, coords: coordinates.Coords) -> None:
+        if self.cones:
+            slot_bits = self.dependants[coords[1] * self.terrain.size[0] + coords[0]]
+            if slot_bits.any():
+                for slot in np.flatnonzero(np.unpackbits(slot_bits, bitorder='little')).tolist():
+                    self._forget(slot)
+
+    def _forget(self, slot: int) -> None:
+        cone = self.cones.pop(self.slot_keys[slot])
+        self.slot_keys[slot] = None
+        self.dependants[cone.inspected, slot >> 3] &= ~np.uint8(1 << (slot & 7))
+        self.free_slots.append(slot)
+
+    def cone(self, position: coordinates.Coords, facing: characters.Facing) -> set[coordinates.Coords]:
+        return set(self._cached_cone(position, facing).coords)
+
+    def cone_cells(self, position: coordinates.Coords, facing: characters.Facing) -> np.ndarray:
+        """ The cone as a read-only array of cell numbers. """
+        return self._cached_cone(position, facing).cells
+
+    def _cached_cone(self, position: coordinates.Coords, facing: characters.Facing) -> CachedCone:
+        key = (position, facing)
+        cone = self.cones.get(key)
+        if cone is None:
+            if not self.free_slots:
+                self._forget(next(iter(self.cones.values())).slot)
+            cast = self.caster(self.terrain, position, facing)
+            cells = cast.visible.copy()
+            cells.flags.writeable = False
+            # Ray casters inspect exactly the cells they reveal, the copy then serves for both.
+            inspected = cells if cast.inspected is cast.visible else cast.inspected
+            cone = CachedCone(
+                self.free_slots.pop(), frozenset(map(self.coords.__getitem__, cells.tolist())), cells, inspected,
+            )
+            self.cones[key] = cone
+            self.slot_keys[cone.slot] = key
+            if self.dependants is None:
+                self.dependants = np.zeros((len(self.coords), CONE_CACHE_SIZE // 8), dtype=np.uint8)
+            self.dependants[cone.inspected, cone.slot >> 3] |= np.uint8(1 << (cone.slot & 7))
+        return cone
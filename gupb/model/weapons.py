@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-import math
-from typing import NamedTuple, List
+import functools
+from typing import NamedTuple, List, Optional
+
+import numpy as np
 
 from gupb.model import arenas
 from gupb.model import characters
@@ -14,9 +16,37 @@ class WeaponDescription(NamedTuple):
     name: str
 
 
+@functools.lru_cache(maxsize=None)
+def weapon_description(name: str) -> WeaponDescription:
+    return WeaponDescription(name)
+
+
+@functools.lru_cache(maxsize=None)
+def prescience_mask(radius: int) -> np.ndarray:
+    """
+    Read-only boolean (2 * radius + 1) x (2 * radius + 1) window, indexed [dy + radius, dx + radius],
+    marking the offsets a prophetic weapon of the given radius reveals around its wielder.
+    """
+    dys, dxs = np.indices((2 * radius + 1, 2 * radius + 1)) - radius
+    mask = np.sqrt(dxs ** 2 + dys ** 2) <= radius
+    mask.flags.writeable = False
+    return mask
+
+
+@functools.lru_cache(maxsize=None)
+def prescience_offsets(radius: int) -> np.ndarray:
+    # (dx, dy) rows of the mask, in the column-major order the former window scan produced.
+    dxs, dys = np.nonzero(prescience_mask(radius).T)
+    offsets = np.stack([dxs, dys], axis=1) - radius
+    offsets.flags.writeable = False
+    return offsets
+
+
 class Weapon(ABC):
+    __slots__ = ()
+
     def description(self) -> WeaponDescription:
-        return WeaponDescription(self.__class__.__name__.lower())
+        return weapon_description(self.__class__.__name__.lower())
 
     @classmethod
     @abstractmethod
@@ -32,10 +62,44 @@ class Weapon(ABC):
     def cut(self, arena: arenas.Arena, position: coordinates.Coords, facing: characters.Facing) -> None:
         raise NotImplementedError
 
+    @classmethod
+    def footprint_offsets(cls, facing: characters.Facing) -> Optional[tuple[coordinates.Coords, ...]]:
+        # Weapons without a fixed footprint are cut procedurally by their `cut_positions`.
+        return None
+
+    @classmethod
+    def stops_at_obstacles(cls) -> bool:
+        return False
+
+    @classmethod
+    def footprint_positions(
+            cls,
+            terrain: arenas.Terrain,
+            position: coordinates.Coords,
+            facing: characters.Facing
+    ) -> Optional[List[coordinates.Coords]]:
+        # Attacks on a real terrain are looked up in its footprint table, other mappings and weapons
+        # without `footprint_offsets` get None.
+        if isinstance(terrain, arenas.Terrain) and terrain.within(*position):
+            return terrain.footprints.positions(cls, position, facing)
+        return None
+
     @classmethod
     def prescience(cls, position: coordinates.Coords, facing: characters.Facing) -> list[coordinates.Coords]:
         return []
 
+    @classmethod
+    def prescience_cells(
+            cls,
+            terrain: arenas.Terrain,
+            position: coordinates.Coords,
+            facing: characters.Facing
+    ) -> Optional[np.ndarray]:
+        prescience = cls.prescience(position, facing)
+        if not prescience:
+            return None
+        return np.array([terrain.cell(coords) for coords in prescience if coords in terrain], dtype=np.intp)
+
     @classmethod
     def droppable(cls) -> bool:
         return True
@@ -51,6 +115,8 @@ class Weapon(ABC):
 
 
 class LineWeapon(Weapon, ABC):
+    __slots__ = ()
+
     @staticmethod
     @abstractmethod
     def reach() -> int:
@@ -63,6 +129,9 @@ class LineWeapon(Weapon, ABC):
             position: coordinates.Coords,
             facing: characters.Facing
     ) -> List[coordinates.Coords]:
+        footprint = cls.footprint_positions(terrain, position, facing)
+        if footprint is not None:
+            return footprint
         cut_positions = []
         cut_position = position
         for _ in range(cls.reach()):
@@ -74,21 +143,47 @@ class LineWeapon(Weapon, ABC):
                 break
         return cut_positions
 
+    @classmethod
+    def footprint_offsets(cls, facing: characters.Facing) -> tuple[coordinates.Coords, ...]:
+        return tuple(facing.value * distance for distance in range(1, cls.reach() + 1))
+
+    @classmethod
+    def stops_at_obstacles(cls) -> bool:
+        return True
+
     def cut(self, arena: arenas.Arena, position: coordinates.Coords, facing: characters.Facing) -> None:
         for cut_position in self.cut_positions(arena.terrain, position, facing):
             self.cut_transparent(arena, cut_position)
 
 
 class PropheticWeapon(Weapon, ABC):
+    __slots__ = ()
+
     @classmethod
     def prescience(cls, position: coordinates.Coords, facing: characters.Facing) -> list[coordinates.Coords]:
-        radius = cls.prescience_radius()
-        visible_coordinates = []
-        for x in range(position.x - radius, position.x + radius + 1):
-            for y in range(position.y - radius, position.y + radius + 1):
-                if math.sqrt((x - position.x) ** 2 + (y - position.y) ** 2) <= radius:
-                    visible_coordinates.append(coordinates.Coords(x, y))
-        return visible_coordinates
+        return [
+            coordinates.Coords(position[0] + dx, position[1] + dy)
+            for dx, dy in prescience_offsets(cls.prescience_radius()).tolist()
+        ]
+
+    @classmethod
+    def prescience_cells(
+            cls,
+            terrain: arenas.Terrain,
+            position: coordinates.Coords,
+            facing: characters.Facing
+    ) -> Optional[np.ndarray]:
+        width, height = terrain.size
+        offsets = prescience_offsets(cls.prescience_radius())
+        xs = offsets[:, 0] + position[0]
+        ys = offsets[:, 1] + position[1]
+        inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        cells = ys[inside] * width + xs[inside]
+        return terrain.existing_cells(cells)
+
+    @classmethod
+    def prescience_mask(cls) -> np.ndarray:
+        return prescience_mask(cls.prescience_radius())
 
     @staticmethod
     @abstractmethod
@@ -97,6 +192,8 @@ class PropheticWeapon(Weapon, ABC):
 
 
 class Knife(LineWeapon):
+    __slots__ = ()
+
     @staticmethod
     def reach() -> int:
         return 1
@@ -107,17 +204,21 @@ class Knife(LineWeapon):
 
 
 class Sword(LineWeapon):
+    __slots__ = ()
+
     @staticmethod
     def reach() -> int:
         return 3
 
 
 class Bow(LineWeapon):
+    __slots__ = ('ready',)
+
     def __init__(self):
         self.ready: bool = False
 
     def description(self) -> WeaponDescription:
-        return WeaponDescription(f"{self.__class__.__name__.lower()}_{'loaded' if self.ready else 'unloaded'}")
+        return weapon_description(f"{self.__class__.__name__.lower()}_{'loaded' if self.ready else 'unloaded'}")
 
     @staticmethod
     def reach() -> int:
@@ -136,6 +237,8 @@ class Bow(LineWeapon):
 
 
 class Axe(Weapon):
+    __slots__ = ()
+
     @classmethod
     def cut_positions(
             cls,
@@ -143,11 +246,19 @@ class Axe(Weapon):
             position: coordinates.Coords,
             facing: characters.Facing
     ) -> List[coordinates.Coords]:
+        footprint = cls.footprint_positions(terrain, position, facing)
+        if footprint is not None:
+            return footprint
         centre_position = position + facing.value
         left_position = centre_position + facing.turn_left().value
         right_position = centre_position + facing.turn_right().value
         return [left_position, centre_position, right_position]
 
+    @classmethod
+    def footprint_offsets(cls, facing: characters.Facing) -> tuple[coordinates.Coords, ...]:
+        centre = facing.value
+        return centre + facing.turn_left().value, centre, centre + facing.turn_right().value
+
     @staticmethod
     def cut_effect() -> effects.Effect:
         return effects.WeaponCut(3)
@@ -158,6 +269,8 @@ class Axe(Weapon):
 
 
 class Amulet(PropheticWeapon, Weapon):
+    __slots__ = ()
+
     @staticmethod
     def prescience_radius() -> int:
         return 3
@@ -169,6 +282,9 @@ class Amulet(PropheticWeapon, Weapon):
             position: coordinates.Coords,
             facing: characters.Facing
     ) -> List[coordinates.Coords]:
+        footprint = cls.footprint_positions(terrain, position, facing)
+        if footprint is not None:
+            return footprint
         return [
             coordinates.Coords(*position + (1, 1)),
             coordinates.Coords(*position + (-1, 1)),
@@ -180,12 +296,21 @@ class Amulet(PropheticWeapon, Weapon):
             coordinates.Coords(*position + (-2, -2)),
         ]
 
+    @classmethod
+    def footprint_offsets(cls, facing: characters.Facing) -> tuple[coordinates.Coords, ...]:
+        return tuple(
+            coordinates.Coords(dx, dy)
+            for dx, dy in ((1, 1), (-1, 1), (1, -1), (-1, -1), (2, 2), (-2, 2), (2, -2), (-2, -2))
+        )
+
     def cut(self, arena: arenas.Arena, position: coordinates.Coords, facing: characters.Facing) -> None:
         for cut_position in self.cut_positions(arena.terrain, position, facing):
             self.cut_transparent(arena, cut_position)
 
 
 class Scroll(LineWeapon):
+    __slots__ = ('charges',)
+
     def __init__(self):
         self.charges: int = 5
 
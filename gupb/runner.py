@@ -1,26 +1,37 @@
 from __future__ import annotations
 import collections
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass
 import logging
+import multiprocessing
+import os
 import random
 from typing import Any, List, Optional
 
-from tqdm import trange
+from tqdm import tqdm, trange
 
 from gupb import controller
 from gupb.controller import keyboard
 from gupb.model.profiling import PROFILE_RESULTS, print_stats
 from gupb.logger import core as logger_core
+from gupb.logger import sinks as logger_sinks
 from gupb.model import coordinates
 from gupb.model import games
+from gupb.model import visibility
 from gupb.view import render
 
 verbose_logger = logging.getLogger('verbose')
 
+GameScores = dict[str, int]
+
+_worker_runner: Optional[Runner] = None
+
+
 class Runner:
     def __init__(self, config: dict[str, Any]) -> None:
         self.arenas: list[str] = config['arenas']
         self.controllers: list[controller.Controller] = config['controllers']
+        self.configured_controllers: list[controller.Controller] = list(self.controllers)
         self.keyboard_controller: Optional[keyboard.KeyboardController] = next(
             (c for c in self.controllers if isinstance(c, keyboard.KeyboardController)), None
         )
@@ -30,27 +41,87 @@ class Runner:
         self.start_balancing: bool = config['start_balancing']
         self.scores: dict[str, int] = collections.defaultdict(int)
         self.profiling_metrics = config['profiling_metrics'] if 'profiling_metrics' in config else None
+        self.visibility_engine: str = (
+            config['visibility_engine'] if 'visibility_engine' in config else visibility.DEFAULT_ENGINE
+        )
+        self.workers: int = config['workers'] if 'workers' in config else 1
+        self.seed: int = config['seed'] if 'seed' in config else random.getrandbits(64)
         self._last_arena: Optional[str] = None
         self._last_menhir_position: Optional[coordinates.Coords] = None
         self._last_initial_positions: Optional[list[coordinates.Coords]] = None
 
     def run(self) -> None:
+        verbose_logger.info(f"Tournament seed is {self.seed}.")
+        TournamentSeedReport(self.seed).log(logging.INFO)
+        if self.workers > 1:
+            self.run_in_parallel()
+            return
         for i in trange(self.runs_no, desc="Playing games"):
-            verbose_logger.info(f"Starting game number {i + 1}.")
-            GameStartReport(i + 1).log(logging.INFO)
-            self.run_game(i)
+            self.play(i)
+
+    def play(self, game_no: int) -> GameScores:
+        rng = games.game_rng(self.seed, game_no)
+        # Controllers draw from the global generator, it is seeded from the game one to keep them reproducible.
+        random.seed(rng.getrandbits(64))
+        if not self.start_balancing or game_no % len(self.controllers) == 0:
+            # A game does not depend on the order in which the previous games left the controllers.
+            self.controllers = list(self.configured_controllers)
+        verbose_logger.info(f"Starting game number {game_no + 1}.")
+        GameStartReport(game_no + 1).log(logging.INFO)
+        return self.run_game(game_no, rng)
+
+    def shards(self) -> list[list[int]]:
+        # Games balancing the starting positions depend on the previous ones, so they are played together.
+        if self.start_balancing:
+            shard_size = len(self.controllers)
+        else:
+            shard_size = max(1, min(16, self.runs_no // (self.workers * 8)))
+        return [list(range(i, min(i + shard_size, self.runs_no))) for i in range(0, self.runs_no, shard_size)]
+
+    def run_in_parallel(self) -> None:
+        if self.renderer or self.keyboard_controller:
+            raise ValueError("Games played in parallel can not be visualised nor played with a keyboard.")
+        log_setup = logger_sinks.worker_log_setup()
+        # Forked workers must not inherit log records still buffered in the parent.
+        logger_sinks.flush_game_logs()
+        # Forking while writer threads run could leave their locks held in the workers.
+        mp_context = multiprocessing.get_context('spawn') if logger_sinks.writers_running() else None
+        with ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=mp_context,
+                initializer=_start_worker,
+                initargs=(self, log_setup),
+        ) as executor:
+            shards = [
+                executor.submit(_run_shard, shard)
+                for shard in self.shards()
+            ]
+            with tqdm(total=self.runs_no, desc="Playing games") as progress:
+                for shard in as_completed(shards):
+                    for _, game_scores in shard.result():
+                        for name, score in game_scores.items():
+                            self.scores[name] += score
+                        progress.update()
+
+    def run_shard(self, games_to_run: list[int]) -> list[tuple[int, GameScores]]:
+        results = [(game_no, self.play(game_no)) for game_no in games_to_run]
+        logger_sinks.flush_game_logs()
+        return results
 
     # noinspection PyBroadException
-    def run_game(self, game_no: int) -> None:
-        arena = random.choice(self.arenas)
-        verbose_logger.debug(f"Randomly picked arena: {arena}.")
-        RandomArenaPickReport(arena).log(logging.DEBUG)
+    def run_game(self, game_no: int, rng: Optional[random.Random] = None) -> GameScores:
+        rng = rng if rng is not None else games.game_rng(self.seed, game_no)
+        arena = rng.choice(self.arenas)
+        verbose_logger.debug("Randomly picked arena: %s.", arena)
+        RandomArenaPickReport.emit(logging.DEBUG, arena)
         if not self.start_balancing or game_no % len(self.controllers) == 0:
-            random.shuffle(self.controllers)
+            rng.shuffle(self.controllers)
             game = games.Game(
                 game_no=game_no,
                 arena_name=arena,
                 to_spawn=self.controllers,
+                visibility_engine=self.visibility_engine,
+                rng=rng,
             )
         else:
             self.controllers = self.controllers[1:] + [self.controllers[0]]
@@ -60,6 +131,8 @@ class Runner:
                 to_spawn=self.controllers,
                 menhir_position=self._last_menhir_position,
                 initial_champion_positions=self._last_initial_positions,
+                visibility_engine=self.visibility_engine,
+                rng=rng,
             )
         self._last_arena = game.arena.name
         self._last_menhir_position = game.arena.menhir_position
@@ -69,6 +142,7 @@ class Runner:
             self.renderer.run(game, show_sight, self.keyboard_controller)
         else:
             self.run_in_memory(game)
+        game_scores = collections.defaultdict(int)
         for dead_controller, score in game.score().items():
             verbose_logger.info(f"Controller {dead_controller.name} scored {score} points.")
             ControllerScoreReport(dead_controller.name, score).log(logging.INFO)
@@ -78,6 +152,8 @@ class Runner:
                 verbose_logger.warning(f"Controller {dead_controller.name} throw an unexpected exception: {repr(e)}.")
                 controller.ControllerExceptionReport(dead_controller.name, repr(e)).log(logging.WARN)
             self.scores[dead_controller.name] += score
+            game_scores[dead_controller.name] += score
+        return dict(game_scores)
 
     def print_scores(self) -> None:
         verbose_logger.info(f"Final scores.")
@@ -88,6 +164,7 @@ class Runner:
             scores_to_log.append(ControllerScoreReport(name, score))
             print(score_line)
         FinalScoresReport(scores_to_log).log(logging.INFO)
+        logger_sinks.drain()
 
         if self.profiling_metrics:
             for func in PROFILE_RESULTS.keys():
@@ -95,8 +172,22 @@ class Runner:
 
     @staticmethod
     def run_in_memory(game: games.Game) -> None:
-        while not game.finished:
-            game.cycle()
+        game.play_headless()
+
+
+def _start_worker(runner: Runner, log_setup: tuple[Optional[logger_sinks.GameLogSettings], int]) -> None:
+    global _worker_runner
+    _worker_runner = runner
+    logger_sinks.configure_worker_logs(log_setup, f'worker{os.getpid()}')
+
+
+def _run_shard(games_to_run: list[int]) -> list[tuple[int, GameScores]]:
+    return _worker_runner.run_shard(games_to_run)
+
+
+@dataclass(frozen=True)
+class TournamentSeedReport(logger_core.LoggingMixin):
+    seed: int
 
 
 @dataclass(frozen=True)
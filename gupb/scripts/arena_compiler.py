@@ -0,0 +1,17 @@
+import sys
+
+from tqdm import tqdm
+
+import gupb.model.arenas as arenas
+
+
+def compile_arenas(names: list[str]) -> list[str]:
+    return [arenas.compile_arena(name) for name in tqdm(names, desc="Compiling arenas")]
+
+
+def main() -> None:
+    compile_arenas(sys.argv[1:] or arenas.bundled_names())
+
+
+if __name__ == '__main__':
+    main()
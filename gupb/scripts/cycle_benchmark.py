@@ -0,0 +1,56 @@
+import random
+import sys
+import time
+from typing import Callable
+
+from gupb.controller import random as random_controller
+import gupb.model.arenas as arenas
+import gupb.model.games as games
+
+CHAMPIONS_PER_GAME = 8
+GAMES_PER_ARENA = 5
+
+
+def new_game(name: str, game_no: int) -> games.Game:
+    # The random controllers draw from the global generator, so it is seeded along with the game.
+    random.seed(game_no)
+    controllers = [random_controller.RandomController(f"Random{i}") for i in range(CHAMPIONS_PER_GAME)]
+    return games.Game(game_no, name, controllers, rng=games.game_rng(0, game_no))
+
+
+def play_cycles(game: games.Game) -> int:
+    cycles = 0
+    while not game.finished:
+        game.cycle()
+        cycles += 1
+    return cycles
+
+
+def timed(name: str, play: Callable[[games.Game], int]) -> tuple[int, float, list[dict[str, int]]]:
+    cycles, elapsed, scores = 0, 0.0, []
+    for game_no in range(GAMES_PER_ARENA):
+        game = new_game(name, game_no)
+        start = time.perf_counter()
+        cycles += play(game)
+        elapsed += time.perf_counter() - start
+        scores.append({controller.name: score for controller, score in game.score().items()})
+    return cycles, elapsed, scores
+
+
+def main() -> None:
+    names = sys.argv[1:] or arenas.bundled_names()
+    for name in names:
+        state_machine_cycles, state_machine_time, state_machine_scores = timed(name, play_cycles)
+        headless_cycles, headless_time, headless_scores = timed(name, games.Game.play_headless)
+        if state_machine_cycles != headless_cycles or state_machine_scores != headless_scores:
+            raise RuntimeError(f"The headless loop played different games than the state machine on {name}.")
+        state_machine_us = state_machine_time / state_machine_cycles * 1e6
+        headless_us = headless_time / headless_cycles * 1e6
+        print(
+            f"{name}: {headless_cycles} cycles, {state_machine_us:.2f} us per cycle with the state machine, "
+            f"{headless_us:.2f} us headless, {state_machine_us - headless_us:.2f} us of dispatch overhead"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,15 @@
+import json
+import sys
+
+from gupb.logger import binary
+
+
+def main() -> None:
+    # Prints a binary event log as the lines of a json log, so the existing tooling can read it.
+    for path in sys.argv[1:]:
+        for event in binary.read_events(path):
+            print(json.dumps(event))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,15 @@
+import sys
+
+from tqdm import tqdm
+
+from gupb.logger import index
+
+
+def main() -> None:
+    # Builds the sidecar indices of logs written without them.
+    for path in tqdm(sys.argv[1:], desc="Indexing logs"):
+        index.rebuild(path)
+
+
+if __name__ == '__main__':
+    main()
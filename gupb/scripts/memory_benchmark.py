@@ -0,0 +1,93 @@
+import gc
+import sys
+import tracemalloc
+import types
+from typing import Callable
+
+from gupb.controller import random as random_controller
+import gupb.model.arenas as arenas
+import gupb.model.games as games
+
+CHAMPIONS_PER_GAME = 8
+
+SLOTTED_MODULES = (
+    'gupb.model.characters', 'gupb.model.consumables', 'gupb.model.effects', 'gupb.model.tiles', 'gupb.model.weapons',
+)
+
+# Reachable objects that are not part of what was built.
+SHARED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def retained_bytes(build: Callable[[], object]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    built = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del built
+    return size
+
+
+def new_game(name: str) -> games.Game:
+    controllers = [random_controller.RandomController(f"Random{i}") for i in range(CHAMPIONS_PER_GAME)]
+    return games.Game(0, name, controllers)
+
+
+def slotted_objects(root: object) -> list[object]:
+    seen, found, stack = set(), [], [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, SHARED_TYPES):
+            continue
+        seen.add(id(obj))
+        if type(obj).__module__ in SLOTTED_MODULES and not hasattr(obj, '__dict__'):
+            found.append(obj)
+        stack.extend(gc.get_referents(obj))
+    return found
+
+
+def slot_values(obj: object) -> list[tuple[str, object]]:
+    names = [name for cls in reversed(type(obj).__mro__) for name in getattr(cls, '__slots__', ())]
+    return [(name, getattr(obj, name)) for name in names if hasattr(obj, name)]
+
+
+def dict_layout_class(cls: type, twins: dict[type, type]) -> type:
+    # One class per model class, so that its instances share the dict keys like the original ones did.
+    if cls not in twins:
+        def __init__(self, values: list[tuple[str, object]]) -> None:
+            for name, value in values:
+                setattr(self, name, value)
+        twins[cls] = type(cls.__name__, (), {'__init__': __init__})
+    return twins[cls]
+
+
+def dict_layout_bytes(root: object) -> int:
+    """
+    The memory `root` would keep with the model classes storing their attributes in per-instance dicts,
+    as they did before `__slots__`. The slotted objects are measured against dict based copies of them.
+    """
+    objects = slotted_objects(root)
+    twins: dict[type, type] = {}
+    copies = [(dict_layout_class(type(obj), twins), slot_values(obj)) for obj in objects]
+    dict_based = retained_bytes(lambda: tuple([cls(values) for cls, values in copies])) - sys.getsizeof(tuple(objects))
+    return dict_based - sum(sys.getsizeof(obj) for obj in objects)
+
+
+def main() -> None:
+    names = sys.argv[1:] or arenas.bundled_names()
+    for name in names:
+        # Warms up the arena template cache, so only the per-instance memory is measured.
+        arenas.Arena.load(name)
+        arena = retained_bytes(lambda: arenas.Arena.load(name))
+        game = retained_bytes(lambda: new_game(name))
+        arena_dicts = arena + dict_layout_bytes(arenas.Arena.load(name))
+        game_dicts = game + dict_layout_bytes(new_game(name))
+        print(
+            f"{name}: {arena} bytes per arena ({arena_dicts} with per-instance dicts), "
+            f"{game} bytes per game ({game_dicts} with per-instance dicts)"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+import random
+import sys
+import time
+
+import numpy as np
+
+from gupb.controller import random as random_controller
+from gupb.environment import sessions
+from gupb.model import arenas
+
+OPPONENTS_PER_GAME = 7
+GAMES_PER_ARENA = 5
+
+
+def main() -> None:
+    names = sys.argv[1:] or arenas.bundled_names()
+    random.seed(0)
+    opponents = [random_controller.RandomController(f"Random{i}") for i in range(OPPONENTS_PER_GAME)]
+    for name in names:
+        session = sessions.GameSession([name], opponents, random.Random(0))
+        out = np.zeros(session.encoder.shape, dtype=np.uint8)
+        steps, encoding, describing, stepping = 0, 0.0, 0.0, 0.0
+        for _ in range(GAMES_PER_ARENA):
+            session.reset()
+            finished = False
+            while not finished:
+                # Both are measured with the vision cone of the champion already cast.
+                session.champion.arena.visible_coords(session.champion)
+                start = time.perf_counter()
+                session.observe(out)
+                encoding += time.perf_counter() - start
+                start = time.perf_counter()
+                session.champion.arena.visible_tiles(session.champion)
+                describing += time.perf_counter() - start
+                start = time.perf_counter()
+                _, finished = session.step(random.choice(sessions.ACTIONS))
+                stepping += time.perf_counter() - start
+                steps += 1
+        print(
+            f"{name}: {steps} steps, {encoding / steps * 1e6:.1f} us per observation "
+            f"({steps / encoding:.0f} per second), {describing / steps * 1e6:.1f} us per visible tiles dict, "
+            f"{stepping / steps * 1e6:.1f} us per game step"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,25 +1,103 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
 import collections
-import json
+import glob
+import os
+from typing import Iterable, Iterator, NamedTuple, Optional
 
+import click
 
-def aggregate_scores(log: str, max_games_no: int) -> dict[str, int]:
-    i = 0
+from gupb.logger import binary
+from gupb.logger import index as logger_index
+
+SCORE_TYPE = 'ControllerScoreReport'
+SCORE_EVENT_TYPES = (logger_index.GAME_START_TYPE, SCORE_TYPE)
+
+LOG_PATTERNS = ('*.json', '*.gupblog')
+
+
+class ControllerScores(NamedTuple):
+    score: int
+    games: int
+
+    @property
+    def mean(self) -> float:
+        return self.score / self.games if self.games else 0.0
+
+
+class LogScores(NamedTuple):
+    games: int
+    controllers: dict[str, ControllerScores]
+
+
+def score_events(path: str) -> Iterator[dict]:
+    if logger_index.is_binary_log(path):
+        return binary.read_events(path, SCORE_EVENT_TYPES)
+    return logger_index.json_events(path, SCORE_EVENT_TYPES)
+
+
+def aggregate_log(path: str, max_games_no: Optional[int] = None) -> LogScores:
+    games = 0
     scores = collections.defaultdict(int)
-    with open(f"../../results/together/{log}.json") as file:
-        for line in file.readlines():
-            data = json.loads(line)
-            if data['type'] == 'GameStartReport':
-                i += 1
-                if i > max_games_no:
-                    break
-            elif data['type'] == 'ControllerScoreReport':
-                scores[data['value']['controller_name']] += data['value']['score']
-    return dict(sorted(scores.items(), key=lambda x: x[1]))
-
-
-def main() -> None:
-    result = aggregate_scores("gupb__2022_01_09_01_46_55", 365)
-    print(result)
+    games_played = collections.defaultdict(int)
+    for event in score_events(path):
+        if event['type'] == logger_index.GAME_START_TYPE:
+            if max_games_no is not None and games >= max_games_no:
+                break
+            games += 1
+        else:
+            scores[event['value']['controller_name']] += event['value']['score']
+            games_played[event['value']['controller_name']] += 1
+    return LogScores(games, {name: ControllerScores(scores[name], games_played[name]) for name in scores})
+
+
+def merge(logs: Iterable[LogScores]) -> LogScores:
+    games = 0
+    scores = collections.defaultdict(int)
+    games_played = collections.defaultdict(int)
+    for log in logs:
+        games += log.games
+        for name, controller_scores in log.controllers.items():
+            scores[name] += controller_scores.score
+            games_played[name] += controller_scores.games
+    return LogScores(games, {name: ControllerScores(scores[name], games_played[name]) for name in scores})
+
+
+def log_paths(paths: Iterable[str]) -> list[str]:
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(sorted(
+                log_path for pattern in LOG_PATTERNS for log_path in glob.glob(os.path.join(path, pattern))
+            ))
+        else:
+            found.append(path)
+    return found
+
+
+def aggregate_scores(
+        paths: Iterable[str],
+        max_games_no: Optional[int] = None,
+        workers: Optional[int] = None,
+) -> LogScores:
+    paths = log_paths(paths)
+    if len(paths) <= 1 or workers == 1:
+        return merge(aggregate_log(path, max_games_no) for path in paths)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return merge(executor.map(aggregate_log, paths, [max_games_no] * len(paths)))
+
+
+@click.command()
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True))
+@click.option('-g', '--max_games_no', default=None, type=int,
+              help="The number of games to count from each log, all by default.")
+@click.option('-w', '--workers', default=None, type=int,
+              help="The number of processes reading the logs, one per CPU by default.")
+def main(paths: tuple[str, ...], max_games_no: Optional[int], workers: Optional[int]) -> None:
+    result = aggregate_scores(paths, max_games_no, workers)
+    print(f"{result.games} games.")
+    for i, (name, scores) in enumerate(sorted(result.controllers.items(), key=lambda x: x[1].score, reverse=True)):
+        print(f"{i + 1}.   {name}: {scores.score} points in {scores.games} games, {scores.mean:.2f} on average.")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,30 @@
+import sys
+
+import gupb.model.arenas as arenas
+import gupb.model.visibility as visibility
+
+EXAMPLES_PER_ARENA = 3
+
+
+def validate_arena(name: str, engine: str) -> int:
+    terrain = arenas.Arena.load(name).terrain
+    differences = list(visibility.validate(terrain, engine))
+    cones = 4 * int(terrain.passable.sum())
+    print(f"{name}: {len(differences)} of {cones} cones differ from the {visibility.REFERENCE_ENGINE} model")
+    for difference in differences[:EXAMPLES_PER_ARENA]:
+        print(
+            f"  {difference.position} {difference.facing.name}: "
+            f"missing {sorted(difference.missing)}, extra {sorted(difference.extra)}"
+        )
+    return len(differences)
+
+
+def main() -> None:
+    engine = sys.argv[1] if len(sys.argv) > 1 else 'shadowcasting'
+    names = sys.argv[2:] or arenas.bundled_names()
+    total = sum(validate_arena(name, engine) for name in names)
+    print(f"{engine}: {total} differing cones in {len(names)} arenas")
+
+
+if __name__ == '__main__':
+    main()
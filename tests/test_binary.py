@@ -0,0 +1,48 @@
+from dataclasses import dataclass
+import logging
+
+import pytest
+
+from gupb.logger import binary
+from gupb.logger import core as logger_core
+
+
+@dataclass(frozen=True)
+class ScoreReport(logger_core.LoggingMixin):
+    controller_name: str
+    score: int
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    path = tmp_path / 'log.gupblog'
+    handler = binary.BinaryEventHandler(str(path), indexed=False)
+    logger = logging.getLogger('test_binary')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    try:
+        for score in range(10):
+            report = ScoreReport(f'controller{score % 3}', score)
+            logger.info('', extra={'event_type': 'ScoreReport', 'report': report})
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+    return path
+
+
+def test_truncated_tail_is_left_out(log_path):
+    data = log_path.read_bytes()
+    log_path.write_bytes(data[:-1])
+    scores = [event['value']['score'] for event in binary.read_events(str(log_path))]
+    assert scores == list(range(9))
+
+
+def test_corrupted_middle_raises(log_path):
+    offsets = [offset for offset, _, _ in binary.read_records(str(log_path))]
+    data = bytearray(log_path.read_bytes())
+    # The schema number of the sixth event, no such schema is defined.
+    data[offsets[5] + 1] = 0x7f
+    log_path.write_bytes(data)
+    with pytest.raises(binary.BinaryLogError):
+        list(binary.read_events(str(log_path)))
@@ -0,0 +1,39 @@
+from typing import List
+
+from gupb.model import arenas
+from gupb.model import characters
+from gupb.model import coordinates
+from gupb.model import weapons
+
+
+class Spear(weapons.Weapon):
+    """ A weapon written against the procedural interface only. """
+
+    @classmethod
+    def cut_positions(
+            cls,
+            terrain: arenas.Terrain,
+            position: coordinates.Coords,
+            facing: characters.Facing
+    ) -> List[coordinates.Coords]:
+        return [position + facing.value + facing.value]
+
+    def cut(self, arena: arenas.Arena, position: coordinates.Coords, facing: characters.Facing) -> None:
+        for cut_position in self.cut_positions(arena.terrain, position, facing):
+            self.cut_transparent(arena, cut_position)
+
+
+def test_arenas_of_the_same_layout_share_footprints():
+    engine_terrain = arenas.Arena.load('ordinary_chaos').terrain
+    controller_terrain = arenas.Arena.load('ordinary_chaos').terrain
+    position = engine_terrain.free[0]
+    weapons.Sword.cut_positions(engine_terrain, position, characters.Facing.DOWN)
+    weapons.Sword.cut_positions(controller_terrain, position, characters.Facing.DOWN)
+    assert controller_terrain.footprints.footprints is engine_terrain.footprints.footprints
+
+
+def test_weapons_without_footprint_offsets_are_cut_procedurally():
+    terrain = arenas.Arena.load('ordinary_chaos').terrain
+    position = terrain.free[0]
+    assert Spear.footprint_positions(terrain, position, characters.Facing.DOWN) is None
+    assert Spear().cut_positions(terrain, position, characters.Facing.DOWN) == [position + (0, 2)]
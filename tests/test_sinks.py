@@ -0,0 +1,77 @@
+import logging
+import multiprocessing
+import queue
+import threading
+
+from gupb.logger import sinks
+
+
+class PausingQueue(queue.Queue):
+    """ Holds the writer right after its first timeout, until the test lets it go, and tells when it is back. """
+
+    def __init__(self, maxsize: int = 0) -> None:
+        super().__init__(maxsize)
+        self.timed_out = threading.Event()
+        self.resume = threading.Event()
+        self.back = threading.Event()
+
+    def get(self, block=True, timeout=None):
+        if self.resume.is_set():
+            self.back.set()
+        try:
+            return super().get(block, timeout)
+        except queue.Empty:
+            if not self.timed_out.is_set():
+                self.timed_out.set()
+                self.resume.wait()
+            raise
+
+
+def test_batching_handler_writes_partial_batches_in_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(sinks.queue, 'Queue', PausingQueue)
+    path = tmp_path / 'log.txt'
+    handler = sinks.BatchingFileHandler(str(path), queue_size=8, batch_size=2, flush_interval=0.01)
+    logger = logging.getLogger('test_sinks')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    try:
+        assert handler.batches.timed_out.wait(5)
+        # While the writer is about to pick up the partial batch, a full one is handed over before it.
+        for i in range(3):
+            logger.info('%d', i)
+        handler.batches.resume.set()
+        assert handler.batches.back.wait(5)
+        handler.flush()
+        assert path.read_text().split() == ['0', '1', '2']
+    finally:
+        handler.batches.resume.set()
+        logger.removeHandler(handler)
+        handler.close()
+
+
+def log_in_worker(setup, tag):
+    sinks.configure_worker_logs(setup, tag)
+    logging.getLogger('verbose').info('worker message')
+    sinks.flush_game_logs()
+
+
+def test_spawned_workers_set_up_game_logs_of_their_own(tmp_path, monkeypatch):
+    monkeypatch.setattr(sinks, 'game_log_settings', None)
+    sinks.configure_game_logs(sinks.GameLogSettings(str(tmp_path), 'run'))
+    try:
+        setup = sinks.worker_log_setup()
+        worker = multiprocessing.get_context('spawn').Process(target=log_in_worker, args=(setup, 'worker1'))
+        worker.start()
+        worker.join()
+        assert worker.exitcode == 0
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            'run.json', 'run.json.index', 'run.log', 'run.worker1.json', 'run.worker1.json.index', 'run.worker1.log',
+        ]
+        assert 'worker message' in (tmp_path / 'run.worker1.log').read_text()
+    finally:
+        for name in sinks.GAME_LOGGERS:
+            logger = logging.getLogger(name)
+            for handler in list(logger.handlers):
+                logger.removeHandler(handler)
+                handler.close()
@@ -0,0 +1,27 @@
+import copy
+import pickle
+
+import pytest
+
+from gupb.model import arenas
+from gupb.model import terrains
+from gupb.model import weapons
+
+
+@pytest.mark.parametrize('clone', [copy.deepcopy, lambda arena: pickle.loads(pickle.dumps(arena))])
+def test_arena_round_trip(clone):
+    arena = arenas.Arena.load('ordinary_chaos')
+    cloned = clone(arena)
+    terrain = cloned.terrain
+    assert list(terrain) == list(arena.terrain)
+    assert (terrain.codes == arena.terrain.codes).all()
+    assert bytes(terrain.passable_flat) == terrain.passable.tobytes()
+    assert bytes(terrain.transparent_flat) == terrain.transparent.tobytes()
+
+    # The flat views of the copy write to its own arrays.
+    coords = terrain.free[0]
+    terrain[coords].loot = weapons.Knife()
+    assert terrain.loot_codes[coords.y, coords.x] == terrains.LOOT_CODES['knife']
+    assert arena.terrain.loot_codes[coords.y, coords.x] == 0
+    assert coords not in terrain.free
+    assert coords in arena.terrain.free